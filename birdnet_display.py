@@ -1,26 +1,42 @@
+import time
+STARTUP_STARTED_AT = time.perf_counter()  # Imports and time to the first /data are measured from here
+
 import requests
 from flask import Flask, render_template, url_for, send_file, request, jsonify
 from datetime import datetime, timedelta
+from collections import deque
 import os
 import random
 import socket
-import qrcode
 import io
 import json
 import sys
 import re
+import queue
+import atexit
+import contextlib
+import signal
+import sqlite3
+import subprocess
 import threading
 from urllib.parse import quote
-from bs4 import BeautifulSoup
+# bs4 and qrcode are imported where they are used, so startup doesn't wait for them.
 
 # Import variables and functions from the new cache builder script
-from cache_builder import CACHE_DIRECTORY, SPECIES_FILE, load_species_from_file
+from cache_builder import (
+    CACHE_DIRECTORY, VARIANT_MIME_TYPES, PINNED_SPECIES_FILE, SPECIES_USAGE_FILE, CACHE_BUDGET_MB,
+    SPECIES_REGISTRY, species_folder_name_for, load_species_usage, enforce_cache_budget,
+    process_species
+)
+IMPORTS_FINISHED_AT = time.perf_counter()
 
 # --- Constants and Configuration ---
 CONFIG_PATH = "config.json"
 DEFAULT_CONFIG = {
     "birdnet_pi_base_url": "",
-    "config_version": 0
+    "config_version": 0,
+    "cache_budget_mb": CACHE_BUDGET_MB,
+    "shared_snapshot_path": ""  # e.g. "snapshot.db" to share one snapshot between server processes
 }
 CONFIG_LOCK = threading.Lock()
 HEADERS = {
@@ -72,14 +88,14 @@ def set_birdnet_base_url(new_value):
         save_config(CONFIG)
         BIRDNET_PI_BASE_URL = normalized
     with BIRD_DATA_CACHE_LOCK:
+        _publish_snapshot_locked((), False, polled_at=0.0)
         BIRD_DATA_CACHE.update({
-            "data": [],
-            "api_is_down": False,
             "fetched_at": datetime.min,
             "refresh_in_progress": False
         })
-    DETECTION_CACHE["id"] = None
-    DETECTION_CACHE["raw_data"] = []
+    DETECTION_CACHE["times"] = {}
+    DETECTION_CACHE["pinned"] = frozenset()
+    DETECTION_CACHE["raw_data"] = ()
     DAILY_DETECTION_CACHE.clear()
     return normalized
 
@@ -94,23 +110,69 @@ def build_birdnet_pi_stats_url():
     return f"{BIRDNET_PI_BASE_URL}/todays_detections.php"
 
 SERVER_PORT = 5000
-PINNED_SPECIES_FILE = "pinned_species.json"
 PINNED_DURATION_HOURS = 24
 BIRD_DATA_CACHE_TTL_SECONDS = 4
+MIN_UPSTREAM_FETCH_INTERVAL_SECONDS = 2  # Forced refreshes inside this window reuse the last fetch
+FORCED_REFRESH_WAIT_SECONDS = 5  # How long a forced request waits on an in-flight fetch before serving what it has
+SNAPSHOT_HISTORY_SIZE = 32  # Deltas kept for /data?since=<version>; older clients get a full resync
+OFFLINE_SLOT_COUNT = 4  # Cards filled from the local cache when BirdNET-Pi is unreachable
+CACHE_MAINTENANCE_INTERVAL_SECONDS = 600  # How often usage stats are saved and the cache budget checked
+CACHE_EVICTIONS_PER_PASS = 5  # Keeps each background eviction pass short
+LAZY_FILL_QUEUE_SIZE = 20  # Species waiting for an on-demand cache fill; extras are dropped
+LAZY_FILL_PAUSE_SECONDS = 5  # Gap between fill jobs so they never crowd out the refresh path
+LAZY_FILL_RETRY_SECONDS = 1800  # Don't queue the same species again sooner than this
+SHARED_SNAPSHOT_SYNC_SECONDS = 1  # How often a process checks the shared store for a newer snapshot
+POLLER_LEASE_SECONDS = 15  # A process that stops polling hands the poller role over after this
+WARM_START_FILE = "last_snapshot.json"  # Last good snapshot, for startups without a shared store
+WARM_START_SAVE_SECONDS = 120
+BACKLIGHT_ROOT = "/sys/class/backlight"
+PREFERRED_BACKLIGHT_DEVICE = "10-0045"  # Official Raspberry Pi touchscreen, used when several are present
+BRIGHTNESS_WRITE_INTERVAL_SECONDS = 0.05  # Slider bursts collapse to at most one write per interval
+PERF_REPORT_HISTORY_SIZE = 60  # Render-timing reports from the kiosk page kept for /debug/perf
+PERF_REPORT_FIELDS = (
+    'window_ms', 'frames', 'slow_frames', 'max_frame_ms', 'long_tasks',
+    'long_task_ms', 'max_long_task_ms', 'transitions', 'max_transition_ms'
+)
 
 # --- Flask App Initialization ---
 app = Flask(__name__, template_folder='static')
 
 # --- Caching & Status Globals ---
-DETECTION_CACHE = { "id": None, "raw_data": [] }
+DETECTION_CACHE = { "times": {}, "pinned": frozenset(), "raw_data": () }
 DAILY_DETECTION_CACHE = {}
 BIRD_DATA_CACHE = {
-    "data": [],
+    "data": (),  # Published snapshot: a tuple of FrozenBird, never modified in place
     "api_is_down": False,
     "fetched_at": datetime.min,
-    "refresh_in_progress": False
+    "refresh_in_progress": False,
+    "fetch_started_at": float('-inf'),  # time.monotonic() of the last upstream fetch
+    "refresh_count": 0,  # Completed refreshes; forced requests wait for this to move
+    "version": 0,  # Bumped whenever the published data changes
+    "epoch": os.urandom(4).hex(),  # Names the version sequence; a new one forces clients to resync
+    "history": deque(maxlen=SNAPSHOT_HISTORY_SIZE),  # (version, delta from version - 1)
+    "synced_at": 0.0  # time.monotonic() of the last check against the shared store
 }
 BIRD_DATA_CACHE_LOCK = threading.Lock()
+BIRD_DATA_REFRESHED = threading.Condition(BIRD_DATA_CACHE_LOCK)
+# Per-species detection stats used to decide what the cache keeps when it is over budget
+SPECIES_USAGE = load_species_usage()
+SPECIES_USAGE_LOCK = threading.Lock()
+SPECIES_USAGE_DIRTY = False
+# Background cache fills for detected species that have no cached images
+LAZY_FILL_QUEUE = queue.Queue(maxsize=LAZY_FILL_QUEUE_SIZE)
+LAZY_FILL_LOCK = threading.Lock()
+LAZY_FILL_LAST_QUEUED = {}
+# Recent render-timing reports posted by the page
+PERF_REPORTS = deque(maxlen=PERF_REPORT_HISTORY_SIZE)
+PERF_REPORTS_LOCK = threading.Lock()
+STARTUP_TIMINGS = {
+    "imports_ms": round((IMPORTS_FINISHED_AT - STARTUP_STARTED_AT) * 1000),
+    "warm_start": None,  # Where the first snapshot came from: "shared store", "file" or None
+    "first_data_ms": None
+}
+WARM_START_SAVED_VERSION = None
+BACKGROUND_SERVICES_PID = None  # Process that ran start_background_services()
+BACKGROUND_SERVICES_LOCK = threading.Lock()
 
 # --- Pinned Species Management ---
 def load_pinned_species():
@@ -171,6 +233,117 @@ def get_active_pinned_species():
 
     return active
 
+# --- Cache Usage Tracking and Eviction ---
+def record_species_detections(birds):
+    """Count each newly seen detection towards its species' usage stats."""
+    global SPECIES_USAGE_DIRTY
+    with SPECIES_USAGE_LOCK:
+        for bird in birds:
+            stats = SPECIES_USAGE['species'].setdefault(bird['name'], {'count': 0})
+            if stats.get('last_time_raw') != bird.get('time_raw'):
+                stats['count'] = stats.get('count', 0) + 1
+                stats['last_time_raw'] = bird.get('time_raw')
+                stats['last_seen'] = datetime.now().isoformat(timespec='seconds')
+                SPECIES_USAGE_DIRTY = True
+
+def set_fallback_rotation(species_names):
+    """Remember which species the offline view is showing so eviction leaves them alone."""
+    global SPECIES_USAGE_DIRTY
+    with SPECIES_USAGE_LOCK:
+        if SPECIES_USAGE.get('fallback_rotation') != species_names:
+            SPECIES_USAGE['fallback_rotation'] = species_names
+            SPECIES_USAGE_DIRTY = True
+
+def save_species_usage():
+    global SPECIES_USAGE_DIRTY
+    with SPECIES_USAGE_LOCK:
+        if not SPECIES_USAGE_DIRTY:
+            return
+        snapshot = json.dumps(SPECIES_USAGE, indent=2)
+        SPECIES_USAGE_DIRTY = False
+    try:
+        with open(SPECIES_USAGE_FILE, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+    except IOError as e:
+        print(f"Error saving species usage file: {e}")
+
+def run_cache_maintenance_pass():
+    """Save usage stats and evict a few species if the image cache is over budget.
+
+    Only the process polling BirdNET-Pi runs this: it holds the up-to-date
+    usage stats, and one maintenance pass per host is enough.
+    """
+    if not IS_UPSTREAM_POLLER:
+        return
+    save_species_usage()
+    budget_mb = float(CONFIG.get('cache_budget_mb') or CACHE_BUDGET_MB)
+    with SPECIES_USAGE_LOCK:
+        protected = set(get_active_pinned_species()) | set(SPECIES_USAGE.get('fallback_rotation', []))
+    evicted = enforce_cache_budget(int(budget_mb * 1048576), protected, max_evictions=CACHE_EVICTIONS_PER_PASS)
+    for common_name, score, freed in evicted:
+        print(f"[INFO] Evicted cached images for {common_name} (score {score:.2f}, {freed / 1048576:.1f} MB)")
+
+def cache_maintenance_loop():
+    while True:
+        time.sleep(CACHE_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            run_cache_maintenance_pass()
+        except Exception as exc:
+            print(f"[ERROR] Cache maintenance failed: {exc}")
+
+def start_cache_maintenance():
+    threading.Thread(target=cache_maintenance_loop, name="cache-maintenance", daemon=True).start()
+
+# --- On-Demand Cache Fill ---
+def queue_cache_fill(common_name, scientific_name=""):
+    """Queue a background cache fill for a species, unless it is queued or was tried recently."""
+    if not common_name or common_name == 'Unknown Species':
+        return False
+    now = time.monotonic()
+    with LAZY_FILL_LOCK:
+        last_queued = LAZY_FILL_LAST_QUEUED.get(common_name)
+        if last_queued is not None and now - last_queued < LAZY_FILL_RETRY_SECONDS:
+            return False
+        try:
+            LAZY_FILL_QUEUE.put_nowait((common_name, scientific_name or common_name))
+        except queue.Full:
+            return False
+        LAZY_FILL_LAST_QUEUED[common_name] = now
+    print(f"[INFO] Queued background image cache fill for {common_name}")
+    return True
+
+def queue_fills_for_uncached(birds):
+    for bird in birds:
+        if not SPECIES_REGISTRY.has_cached_images(bird['name']):
+            scientific_name = bird.get('scientific_name') or SPECIES_REGISTRY.scientific_name(bird['name'])
+            queue_cache_fill(bird['name'], scientific_name)
+
+def lazy_fill_loop():
+    try:
+        # Run this thread at a lower CPU priority than the web server (Linux only).
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+    while True:
+        common_name, scientific_name = LAZY_FILL_QUEUE.get()
+        try:
+            _, success = process_species((common_name, scientific_name))
+            SPECIES_REGISTRY.invalidate(common_name)
+            # The species' detection time hasn't changed, so make the next poll
+            # rebuild the records instead of reusing the ones without images.
+            DETECTION_CACHE["times"] = {name: time_raw for name, time_raw in DETECTION_CACHE["times"].items()
+                                        if name != common_name}
+            if success:
+                print(f"[INFO] Cached images for {common_name} are now available")
+        except Exception as exc:
+            print(f"[ERROR] Background cache fill for {common_name} failed: {exc}")
+        finally:
+            LAZY_FILL_QUEUE.task_done()
+        time.sleep(LAZY_FILL_PAUSE_SECONDS)
+
+def start_lazy_cache_fill():
+    threading.Thread(target=lazy_fill_loop, name="lazy-cache-fill", daemon=True).start()
+
 # --- IP and QR Code Helpers ---
 def get_local_ip():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -202,6 +375,7 @@ def build_display_access_url():
 
 @app.route('/qr_code.png')
 def qr_code():
+    import qrcode
     url = get_qr_target_url()
     if not url:
         placeholder = "Configure base URL first"
@@ -215,6 +389,7 @@ def qr_code():
 
 @app.route('/qr_setup.png')
 def qr_setup_code():
+    import qrcode
     display_url = build_display_access_url()
     img = qrcode.make(display_url)
     buf = io.BytesIO()
@@ -223,17 +398,8 @@ def qr_setup_code():
     return send_file(buf, mimetype='image/png')
 
 # --- Time Helper Functions ---
-def parse_absolute_time_to_seconds_ago(time_str):
-    if not time_str: return 0
-    try:
-        time_format = "%Y-%m-%d %H:%M:%S"
-        detection_time = datetime.strptime(time_str, time_format)
-        time_difference = datetime.now() - detection_time
-        return max(0, time_difference.total_seconds())
-    except (ValueError, TypeError):
-        return 0
-
 def format_seconds_ago(total_seconds):
+    total_seconds = max(0, total_seconds)
     if total_seconds < 60: return f"{int(total_seconds)}s ago"
     minutes = total_seconds / 60
     if minutes < 60: return f"{int(minutes)}m ago"
@@ -241,6 +407,13 @@ def format_seconds_ago(total_seconds):
     if hours < 24: return f"{int(hours)}h ago"
     return f"{int(hours / 24)}d ago"
 
+@app.template_filter('time_ago')
+def time_ago_filter(detected_at):
+    """Render an epoch detection time as "Xm ago" for the initial page load."""
+    if not detected_at:
+        return ""
+    return format_seconds_ago(time.time() - detected_at)
+
 def parse_detection_datetime(time_raw):
     """Convert the raw detection timestamp into a datetime for sorting/deduping."""
     if not time_raw:
@@ -259,8 +432,56 @@ def check_image_url_fast(url):
     except requests.exceptions.RequestException:
         return False
 
+class DetectionRow:
+    """One parsed row of the BirdNET-Pi detections table.
+
+    A refresh parses up to a thousand rows and the per-species dedupe drops
+    most of them, so rows stay small; only the survivors become display
+    records (see build_display_record).
+    """
+    __slots__ = ('name', 'scientific_name', 'time_raw', 'detected_at', 'confidence_value', 'image_url', 'is_new_species')
+
+    def __init__(self, name, scientific_name, time_raw, detected_at, confidence_value, image_url, is_new_species=False):
+        self.name = name
+        self.scientific_name = scientific_name
+        self.time_raw = time_raw
+        self.detected_at = detected_at
+        self.confidence_value = confidence_value
+        self.image_url = image_url
+        self.is_new_species = is_new_species
+
+class FrozenBird(dict):
+    """A bird in a published snapshot. Read-only, so snapshots can be shared by reference."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("published bird records are read-only")
+
+    __setitem__ = __delitem__ = update = pop = popitem = clear = setdefault = _read_only
+
+def build_display_record(row, is_pinned, detections_today, cached_asset=None):
+    record = {
+        "name": row.name,
+        "scientific_name": row.scientific_name,
+        "time_raw": row.time_raw,
+        # Parsed once at ingest; clients render the relative "Xm ago" text themselves.
+        "detected_at": row.detected_at,
+        "confidence_value": row.confidence_value,
+        "confidence": f"{row.confidence_value}%",
+        "image_url": row.image_url,
+        "image_sources": [],
+        "thumb_url": row.image_url,
+        "copyright": "",
+        "is_new_species": row.is_new_species,
+        "is_pinned": is_pinned,
+        "detections_today": detections_today
+    }
+    if cached_asset:
+        record.update(cached_asset)
+    return FrozenBird(record)
+
 def parse_birdnet_pi_row(row, default_date):
-    """Parse a single <tr> row from the BirdNET-Pi detections table."""
+    """Parse a single <tr> row from the BirdNET-Pi detections table into a DetectionRow."""
     cells = row.find_all('td')
     if len(cells) < 3:
         return None
@@ -270,6 +491,8 @@ def parse_birdnet_pi_row(row, default_date):
 
     species_button = mid_td.find('button', attrs={'name': 'species'}) if mid_td else None
     species_name = species_button.get_text(strip=True) if species_button else 'Unknown Species'
+    scientific_tag = mid_td.find('i') if mid_td else None
+    scientific_name = scientific_tag.get_text('\n', strip=True).split('\n')[0] if scientific_tag else ''
 
     image_tag = mid_td.find('img', {'id': 'birdimage'}) if mid_td else None
     image_url = image_tag['src'] if image_tag and image_tag.has_attr('src') else ''
@@ -292,15 +515,28 @@ def parse_birdnet_pi_row(row, default_date):
                 break
 
     time_raw = f"{date_str} {time_text}".strip()
+    detected_at = parse_detection_datetime(time_raw)
 
-    return {
-        "name": species_name,
-        "time_raw": time_raw,
-        "confidence_value": confidence_value,
-        "image_url": image_url,
-        "copyright": "",
-        "is_new_species": False
-    }
+    # Names repeat across hundreds of rows; interning keeps one copy of each.
+    return DetectionRow(
+        sys.intern(species_name), sys.intern(scientific_name), time_raw,
+        detected_at.timestamp() if detected_at != datetime.min else None,
+        confidence_value, image_url
+    )
+
+def parse_detection_rows(html, default_date):
+    """DetectionRows for every row of a detections list page."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = [parse_birdnet_pi_row(row, default_date) for row in soup.select('tr.relative')]
+    # The parse tree (~11 MB for 1000 rows) is full of parent/child reference
+    # cycles; break them so it is freed now rather than at the next full GC pass.
+    # The soup object isn't linked to its children through next_element, so
+    # decomposing it alone would leave the tree intact.
+    for element in list(soup.contents):
+        element.decompose()
+    soup.decompose()
+    return [row for row in rows if row]
 
 def get_today_detection_count(species_name, today_str, stats_url):
     """Fetch today's detection count for a species from BirdNET-Pi stats endpoint."""
@@ -334,37 +570,44 @@ def get_today_detection_count(species_name, today_str, stats_url):
 
 # --- Core Data Fetching Logic ---
 def get_cached_image(species_name):
-    species_folder_name = "".join(c for c in species_name if c.isalnum() or c in ' _').rstrip().replace(' ', '_')
-    species_dir = os.path.join(CACHE_DIRECTORY, species_folder_name)
-    if os.path.isdir(species_dir):
-        images = sorted([f for f in os.listdir(species_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-        if not images: return None
-        chosen_image = random.choice(images)
-        attr_path = os.path.join(species_dir, f"{os.path.splitext(chosen_image)[0]}.txt")
-        copyright_info = ""
-        if os.path.exists(attr_path):
-            with open(attr_path, 'r', encoding='utf-8') as f: copyright_info = f.read().strip()
-        image_url = url_for('static', filename=os.path.join(os.path.basename(CACHE_DIRECTORY), species_folder_name, chosen_image).replace('\\', '/'))
-        return {"image_url": image_url, "copyright": copyright_info}
-    return None
+    assets = SPECIES_REGISTRY.cached_assets(species_name)
+    if not assets: return None
+    chosen = random.choice(assets)
+    static_prefix = f"{os.path.basename(CACHE_DIRECTORY)}/{species_folder_name_for(species_name)}"
+    image_url = url_for('static', filename=f"{static_prefix}/{chosen['file']}")
+    image_sources = []
+    thumb_url = image_url
+    for fmt, variants in chosen['variants'].items():
+        srcset = ", ".join(f"{url_for('static', filename=f'{static_prefix}/{rel_path}')} {width}w" for width, rel_path in variants)
+        image_sources.append({"type": VARIANT_MIME_TYPES[fmt], "srcset": srcset})
+        if thumb_url == image_url:
+            thumb_url = url_for('static', filename=f"{static_prefix}/{variants[0][1]}")
+    return {"image_url": image_url, "copyright": chosen['attribution'], "image_sources": image_sources, "thumb_url": thumb_url}
 
 def get_offline_fallback_data():
     print("[INFO] Loading data from local cache.")
-    species_list = load_species_from_file(SPECIES_FILE)
-    if not species_list: return []
+    # The registry's rotation only holds species with cached images, so every slot is filled.
+    rotation = SPECIES_REGISTRY.next_in_rotation(OFFLINE_SLOT_COUNT)
+    set_fallback_rotation(rotation)
     fallback_data = []
-    num_to_sample = min(len(species_list), 4)
-    sampled_species = random.sample(species_list, num_to_sample)
-    for common_name, scientific_name in sampled_species:
+    for common_name in rotation:
         cached_asset = get_cached_image(common_name)
         if cached_asset:
-            fallback_data.append({
-                "name": common_name, "time_display": "Offline", "confidence": "0%",
+            fallback_data.append(FrozenBird({
+                "name": common_name, "detected_at": None, "confidence": "0%",
                 "confidence_value": 0, "image_url": cached_asset['image_url'],
+                "image_sources": cached_asset['image_sources'], "thumb_url": cached_asset['thumb_url'],
                 "copyright": cached_asset['copyright'], "time_raw": "", "is_offline": True,
                 "detections_today": 0
-            })
-    return fallback_data
+            }))
+    return tuple(fallback_data)
+
+def detections_unchanged(unique_rows, pinned):
+    """True if the latest detection per species and the pinned set match the last snapshot."""
+    previous_times = DETECTION_CACHE["times"]
+    if len(previous_times) != len(unique_rows) or DETECTION_CACHE["pinned"] != pinned:
+        return False
+    return all(previous_times.get(row.name) == row.time_raw for row in unique_rows)
 
 def _fetch_bird_data_from_source():
     today_str = datetime.now().strftime("%Y-%m-%d")
@@ -372,97 +615,257 @@ def _fetch_bird_data_from_source():
     stats_url = build_birdnet_pi_stats_url()
     if not list_url:
         print("[INFO] BirdNET-Pi base URL not configured. Waiting for setup.")
-        return [], True
+        return (), True
     try:
         response = requests.get(list_url, headers=HEADERS, proxies=PROXIES, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('tr.relative')
-        if not rows:
-            return get_offline_fallback_data(), True
-
-        all_parsed = []
-        for row in rows:
-            parsed = parse_birdnet_pi_row(row, today_str)
-            if parsed:
-                all_parsed.append(parsed)
+        all_parsed = parse_detection_rows(response.text, today_str)
 
         if not all_parsed:
             return get_offline_fallback_data(), True
 
-        for bird in all_parsed:
-            if bird.get('is_new_species', False):
-                add_pinned_species(bird['name'])
+        for row in all_parsed:
+            if row.is_new_species:
+                add_pinned_species(row.name)
 
         active_pinned = get_active_pinned_species()
 
         deduped_by_species = {}
-        for bird in all_parsed:
-            name = bird.get('name') or 'Unknown Species'
-            detected_at = parse_detection_datetime(bird.get('time_raw'))
-            bird['_detected_at'] = detected_at
-            bird['is_pinned'] = name in active_pinned
-            existing = deduped_by_species.get(name)
-            if existing is None or detected_at > existing.get('_detected_at', datetime.min):
-                deduped_by_species[name] = bird
-
-        unique_birds = sorted(
+        for row in all_parsed:
+            existing = deduped_by_species.get(row.name)
+            if existing is None or (row.detected_at or 0) > (existing.detected_at or 0):
+                deduped_by_species[row.name] = row
+        del all_parsed
+
+        unique_rows = sorted(
             deduped_by_species.values(),
-            key=lambda d: d.get('_detected_at', datetime.min),
+            key=lambda row: row.detected_at or 0,
             reverse=True
         )
 
-        if not unique_birds:
-            return get_offline_fallback_data(), True
-
-        for bird in unique_birds:
-            bird['detections_today'] = get_today_detection_count(bird['name'], today_str, stats_url)
-
-        for bird in unique_birds:
-            if bird.get('image_url'):
-                if not check_image_url_fast(bird['image_url']):
-                    cached_asset = get_cached_image(bird['name'])
-                    if cached_asset:
-                        bird['image_url'] = cached_asset['image_url']
-                        bird['copyright'] = cached_asset['copyright']
-            else:
-                cached_asset = get_cached_image(bird['name'])
-                if cached_asset:
-                    bird['image_url'] = cached_asset['image_url']
-                    bird['copyright'] = cached_asset['copyright']
-
-        for bird in unique_birds:
-            bird.pop('_detected_at', None)
-
-        new_id = "-".join([f"{d['name']}_{d['time_raw']}" for d in unique_birds])
-
-        if new_id == DETECTION_CACHE["id"]:
-            data_to_process = DETECTION_CACHE["raw_data"]
-        else:
-            DETECTION_CACHE["raw_data"] = unique_birds
-            DETECTION_CACHE["id"] = new_id
-            data_to_process = unique_birds
-
-        display_data = []
-        for bird in data_to_process:
-            bird_display_copy = bird.copy()
-            bird_display_copy['time_display'] = format_seconds_ago(parse_absolute_time_to_seconds_ago(bird['time_raw']))
-            bird_display_copy['confidence'] = f"{bird['confidence_value']}%"
-            bird_display_copy['detections_today'] = bird.get('detections_today', 0)
-            display_data.append(bird_display_copy)
-
-        return display_data, False
+        # Unchanged detections: hand back the previous snapshot object as-is, so
+        # callers can tell nothing changed and no per-bird work is redone.
+        pinned = frozenset(active_pinned)
+        if detections_unchanged(unique_rows, pinned):
+            return DETECTION_CACHE["raw_data"], False
+
+        display_birds = []
+        for row in unique_rows:
+            cached_asset = None
+            if not row.image_url or not check_image_url_fast(row.image_url):
+                cached_asset = get_cached_image(row.name)
+            display_birds.append(build_display_record(
+                row, row.name in active_pinned,
+                get_today_detection_count(row.name, today_str, stats_url), cached_asset
+            ))
+        unique_birds = tuple(display_birds)
+
+        record_species_detections(unique_birds)
+        queue_fills_for_uncached(unique_birds)
+
+        DETECTION_CACHE["raw_data"] = unique_birds
+        DETECTION_CACHE["times"] = {bird['name']: bird['time_raw'] for bird in unique_birds}
+        DETECTION_CACHE["pinned"] = pinned
+        return unique_birds, False
     except requests.exceptions.RequestException:
         print("[INFO] BirdNET-Pi endpoint unavailable, using offline mode")
         return get_offline_fallback_data(), True
 
 
+# --- Shared Snapshot Store ---
+class SharedSnapshotStore:
+    """Bird snapshot shared by every server process through a small SQLite file.
+
+    One row holds the current snapshot and its version, the deltas table keeps
+    the recent per-version diffs for /data?since=N, and a lease row elects the
+    one process that polls BirdNET-Pi. The other processes only read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # One connection for the process, shared by the request threads under a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshot (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                api_is_down INTEGER NOT NULL,
+                polled_at REAL NOT NULL,
+                birds TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS deltas (version INTEGER PRIMARY KEY, delta TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS poller_lease (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS store_epoch (id INTEGER PRIMARY KEY CHECK (id = 1), epoch TEXT NOT NULL);
+            INSERT OR IGNORE INTO snapshot VALUES (1, 0, 0, 0, '[]');
+            INSERT OR IGNORE INTO poller_lease VALUES (1, '', 0);
+        """)
+        # Versions live as long as the file, so the epoch does too; every process shares it.
+        self.conn.execute('INSERT OR IGNORE INTO store_epoch VALUES (1, ?)', (os.urandom(4).hex(),))
+        self.epoch = self.conn.execute('SELECT epoch FROM store_epoch WHERE id = 1').fetchone()[0]
+
+    @contextlib.contextmanager
+    def _transaction(self, begin='BEGIN'):
+        with self.lock:
+            self.conn.execute(begin)
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+
+    def read_version(self):
+        """Return (version, polled_at) of the stored snapshot."""
+        with self.lock:
+            return self.conn.execute('SELECT version, polled_at FROM snapshot WHERE id = 1').fetchone()
+
+    def load(self):
+        """Return (version, polled_at, api_is_down, birds, history) in one consistent read."""
+        with self._transaction() as conn:
+            version, api_is_down, polled_at, birds = conn.execute(
+                'SELECT version, api_is_down, polled_at, birds FROM snapshot WHERE id = 1').fetchone()
+            history = [(row[0], json.loads(row[1])) for row in
+                       conn.execute('SELECT version, delta FROM deltas ORDER BY version')]
+        return version, polled_at, bool(api_is_down), json.loads(birds), history
+
+    def publish(self, version, birds, api_is_down, delta, polled_at):
+        """Store version as the new snapshot; False if another process got there first."""
+        with self._transaction('BEGIN IMMEDIATE') as conn:
+            cursor = conn.execute(
+                'UPDATE snapshot SET version = ?, api_is_down = ?, polled_at = ?, birds = ? WHERE id = 1 AND version = ?',
+                (version, int(api_is_down), polled_at, json.dumps(birds), version - 1))
+            if cursor.rowcount == 1:
+                conn.execute('INSERT OR REPLACE INTO deltas VALUES (?, ?)', (version, json.dumps(delta)))
+                conn.execute('DELETE FROM deltas WHERE version <= ?', (version - SNAPSHOT_HISTORY_SIZE,))
+        return cursor.rowcount == 1
+
+    def touch(self, polled_at):
+        """Record a poll that found nothing new."""
+        with self.lock:
+            self.conn.execute('UPDATE snapshot SET polled_at = ? WHERE id = 1', (polled_at,))
+
+    def try_acquire_poller_lease(self):
+        """Take or renew the poller role; False while another live process holds it."""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                'UPDATE poller_lease SET owner = ?, expires_at = ? WHERE id = 1 AND (owner = ? OR expires_at < ?)',
+                (self.owner, now + POLLER_LEASE_SECONDS, self.owner, now))
+            return cursor.rowcount == 1
+
+    def release_poller_lease(self):
+        """Give up the poller role so another process can take over straight away."""
+        with self.lock:
+            self.conn.execute('UPDATE poller_lease SET expires_at = 0 WHERE id = 1 AND owner = ?', (self.owner,))
+
+def open_shared_snapshot_store():
+    path = CONFIG.get('shared_snapshot_path')
+    if not path:
+        return None
+    try:
+        store = SharedSnapshotStore(path)
+    except sqlite3.Error as exc:
+        print(f"[WARNING] Shared snapshot store unavailable ({exc}); serving a per-process snapshot")
+        return None
+    atexit.register(release_upstream_poller_role, store)
+    return store
+
+def release_upstream_poller_role(store):
+    """Hand the poller lease back on shutdown instead of letting it run out."""
+    try:
+        store.release_poller_lease()
+    except sqlite3.Error as exc:
+        print(f"[WARNING] Could not release the poller lease: {exc}")
+
+# Opened by start_background_services() in each server process, never at import:
+# a process forked from one that had it open must not share its connection.
+SHARED_SNAPSHOT = None
+IS_UPSTREAM_POLLER = True
+
+def _disable_shared_snapshot(exc):
+    global SHARED_SNAPSHOT, IS_UPSTREAM_POLLER
+    print(f"[WARNING] Shared snapshot store failed ({exc}); falling back to a per-process snapshot")
+    SHARED_SNAPSHOT = None
+    IS_UPSTREAM_POLLER = True
+    # From here on this process numbers its own versions, which may repeat the store's.
+    BIRD_DATA_CACHE["epoch"] = os.urandom(4).hex()
+
+def _sync_shared_snapshot_locked(force=False):
+    """Adopt a newer snapshot published by another process."""
+    if SHARED_SNAPSHOT is None:
+        return
+    now = time.monotonic()
+    if not force and now - BIRD_DATA_CACHE["synced_at"] < SHARED_SNAPSHOT_SYNC_SECONDS:
+        return
+    BIRD_DATA_CACHE["synced_at"] = now
+    BIRD_DATA_CACHE["epoch"] = SHARED_SNAPSHOT.epoch
+    try:
+        version, polled_at = SHARED_SNAPSHOT.read_version()
+        if version != BIRD_DATA_CACHE["version"]:
+            version, polled_at, api_is_down, birds, history = SHARED_SNAPSHOT.load()
+            BIRD_DATA_CACHE.update({
+                "data": tuple(FrozenBird(bird) for bird in birds),
+                "api_is_down": api_is_down,
+                "version": version,
+                "history": deque(history, maxlen=SNAPSHOT_HISTORY_SIZE)
+            })
+    except sqlite3.Error as exc:
+        _disable_shared_snapshot(exc)
+        return
+    if polled_at:
+        BIRD_DATA_CACHE["fetched_at"] = max(BIRD_DATA_CACHE["fetched_at"], datetime.fromtimestamp(polled_at))
+
+def acquire_upstream_poller_role():
+    """True if this process may poll BirdNET-Pi now."""
+    global IS_UPSTREAM_POLLER, SPECIES_USAGE
+    if SHARED_SNAPSHOT is None:
+        return True
+    try:
+        acquired = SHARED_SNAPSHOT.try_acquire_poller_lease()
+    except sqlite3.Error as exc:
+        _disable_shared_snapshot(exc)
+        return True
+    if acquired and not IS_UPSTREAM_POLLER:
+        # Taking over from another process: start from the usage stats it saved
+        # and from scratch for per-poll detection state.
+        print("[INFO] This process is now polling BirdNET-Pi for the shared snapshot")
+        with SPECIES_USAGE_LOCK:
+            SPECIES_USAGE = load_species_usage()
+        DETECTION_CACHE.update({"times": {}, "pinned": frozenset(), "raw_data": ()})
+        DAILY_DETECTION_CACHE.clear()
+    IS_UPSTREAM_POLLER = acquired
+    return acquired
+
 def get_bird_data(force_refresh=False):
     """Return cached bird data, refreshing from BirdNET-Pi when stale."""
+    snapshot = get_bird_snapshot(force_refresh)
+    return snapshot["data"], snapshot["api_is_down"]
+
+def get_bird_snapshot(force_refresh=False):
+    """Like get_bird_data() but returns {"data", "api_is_down", "version", "epoch", "refresh"}.
+
+    The data list is shared, not copied: it is never modified after being
+    published, and the version only changes when a new one is published.
+
+    "refresh" says where the data came from: "fresh" (this call fetched it),
+    "coalesced" (a forced call that joined a fetch already in flight),
+    "cached", or "stale" (a forced call whose wait hit the deadline).
+    Forced calls never start more than one upstream fetch per
+    MIN_UPSTREAM_FETCH_INTERVAL_SECONDS, however many clients force.
+    """
     if not is_birdnet_configured():
-        return [], True
+        return {"data": (), "api_is_down": True, "version": 0, "epoch": BIRD_DATA_CACHE["epoch"], "refresh": "cached"}
     now = datetime.now()
-    with BIRD_DATA_CACHE_LOCK:
+    with BIRD_DATA_REFRESHED:
+        _sync_shared_snapshot_locked()
         cache_age = (now - BIRD_DATA_CACHE["fetched_at"]).total_seconds()
         cache_valid = (
             BIRD_DATA_CACHE["data"]
@@ -470,15 +873,36 @@ def get_bird_data(force_refresh=False):
             and not force_refresh
         )
         if cache_valid:
-            return BIRD_DATA_CACHE["data"], BIRD_DATA_CACHE["api_is_down"]
+            return _current_snapshot_locked()
 
         if BIRD_DATA_CACHE["refresh_in_progress"]:
-            # Another request is already refreshing; serve the last cached payload.
-            return BIRD_DATA_CACHE["data"], BIRD_DATA_CACHE["api_is_down"]
+            if not force_refresh:
+                # Another request is already refreshing; serve the last cached payload.
+                return _current_snapshot_locked()
+            # Join the in-flight fetch and return its result.
+            refresh_count = BIRD_DATA_CACHE["refresh_count"]
+            refreshed = BIRD_DATA_REFRESHED.wait_for(
+                lambda: BIRD_DATA_CACHE["refresh_count"] != refresh_count, timeout=FORCED_REFRESH_WAIT_SECONDS)
+            return _current_snapshot_locked("coalesced" if refreshed else "stale")
+
+        if (force_refresh and BIRD_DATA_CACHE["data"]
+                and time.monotonic() - BIRD_DATA_CACHE["fetch_started_at"] < MIN_UPSTREAM_FETCH_INTERVAL_SECONDS):
+            # A fetch has just completed; it is as fresh as a new one would be.
+            return _current_snapshot_locked()
 
         previous_data = BIRD_DATA_CACHE["data"]
         previous_status = BIRD_DATA_CACHE["api_is_down"]
         BIRD_DATA_CACHE["refresh_in_progress"] = True
+        BIRD_DATA_CACHE["fetch_started_at"] = time.monotonic()
+
+    if not acquire_upstream_poller_role():
+        # Another process polls BirdNET-Pi; serve what it last published.
+        with BIRD_DATA_REFRESHED:
+            BIRD_DATA_CACHE["refresh_in_progress"] = False
+            BIRD_DATA_CACHE["refresh_count"] += 1
+            BIRD_DATA_REFRESHED.notify_all()
+            _sync_shared_snapshot_locked(force=True)
+            return _current_snapshot_locked()
 
     bird_data = previous_data
     api_is_down = previous_status
@@ -490,24 +914,236 @@ def get_bird_data(force_refresh=False):
         if not bird_data:
             bird_data, api_is_down = get_offline_fallback_data(), True
     finally:
-        with BIRD_DATA_CACHE_LOCK:
+        with BIRD_DATA_REFRESHED:
+            _publish_snapshot_locked(bird_data, api_is_down, polled_at=time.time())
             BIRD_DATA_CACHE.update({
-                "data": bird_data,
-                "api_is_down": api_is_down,
                 "fetched_at": datetime.now(),
-                "refresh_in_progress": False
+                "refresh_in_progress": False,
+                "refresh_count": BIRD_DATA_CACHE["refresh_count"] + 1
             })
+            BIRD_DATA_REFRESHED.notify_all()
+            snapshot = _current_snapshot_locked("fresh")
 
-    return bird_data, api_is_down
+    return snapshot
+
+def _current_snapshot_locked(refresh="cached"):
+    return {
+        "data": BIRD_DATA_CACHE["data"],
+        "api_is_down": BIRD_DATA_CACHE["api_is_down"],
+        "version": BIRD_DATA_CACHE["version"],
+        "epoch": BIRD_DATA_CACHE["epoch"],
+        "refresh": refresh
+    }
+
+# --- Snapshot Versions and Deltas ---
+def diff_bird_lists(previous, current):
+    """Delta turning one published bird list into the next, keyed by species name."""
+    previous_by_name = {bird['name']: bird for bird in previous}
+    current_names = set()
+    added, updated = [], []
+    for bird in current:
+        current_names.add(bird['name'])
+        old = previous_by_name.get(bird['name'])
+        if old is None:
+            added.append(bird)
+        elif old is not bird and old != bird:
+            updated.append(bird)
+    removed = [name for name in previous_by_name if name not in current_names]
+    return {
+        "added": added,
+        "updated": updated,
+        "removed": removed,
+        "order": [bird['name'] for bird in current]
+    }
+
+def _publish_snapshot_locked(bird_data, api_is_down, polled_at=None):
+    """Make bird_data the current snapshot, bumping the version only if anything changed.
+
+    With a shared store the snapshot is written there too; polled_at is the
+    time of the upstream poll it came from (0 to make the next request poll).
+    """
+    # Diff against the latest shared version, not whatever this process last synced.
+    _sync_shared_snapshot_locked(force=True)
+    previous = BIRD_DATA_CACHE["data"]
+    unchanged = bird_data is previous and api_is_down == BIRD_DATA_CACHE["api_is_down"]
+    if not unchanged:
+        delta = diff_bird_lists(previous, bird_data)
+        unchanged = (
+            not (delta["added"] or delta["updated"] or delta["removed"])
+            and delta["order"] == [bird['name'] for bird in previous]
+            and api_is_down == BIRD_DATA_CACHE["api_is_down"]
+        )
+    if SHARED_SNAPSHOT is not None:
+        try:
+            if unchanged:
+                if polled_at is not None:
+                    SHARED_SNAPSHOT.touch(polled_at)
+            elif not SHARED_SNAPSHOT.publish(BIRD_DATA_CACHE["version"] + 1, bird_data, api_is_down, delta, polled_at or 0.0):
+                # Lost a race with another process; its snapshot wins.
+                _sync_shared_snapshot_locked(force=True)
+                return
+        except sqlite3.Error as exc:
+            _disable_shared_snapshot(exc)
+    if unchanged:
+        return
+    BIRD_DATA_CACHE["version"] += 1
+    BIRD_DATA_CACHE["history"].append((BIRD_DATA_CACHE["version"], delta))
+    BIRD_DATA_CACHE["data"] = bird_data
+    BIRD_DATA_CACHE["api_is_down"] = api_is_down
+
+def get_snapshot_delta(since_version, since_epoch):
+    """Merge the deltas published after since_version; returns (epoch, version, delta).
+
+    delta is None when since_version is unknown (too old for the ring buffer,
+    or from another epoch, i.e. before a restart), in which case the client
+    needs a full resync.
+    """
+    with BIRD_DATA_CACHE_LOCK:
+        epoch = BIRD_DATA_CACHE["epoch"]
+        version = BIRD_DATA_CACHE["version"]
+        history = list(BIRD_DATA_CACHE["history"])
+        order = [bird['name'] for bird in BIRD_DATA_CACHE["data"]]
+    if since_epoch != epoch or since_version > version:
+        return epoch, version, None
+    if since_version < version and (not history or since_version < history[0][0] - 1):
+        return epoch, version, None
+    # For each species, whether it existed at since_version (its first change in the
+    # window tells us) and its latest record if it exists now.
+    existed_before = {}
+    latest = {}
+    for entry_version, delta in history:
+        if entry_version <= since_version:
+            continue
+        for bird in delta["added"]:
+            existed_before.setdefault(bird['name'], False)
+            latest[bird['name']] = bird
+        for bird in delta["updated"]:
+            existed_before.setdefault(bird['name'], True)
+            latest[bird['name']] = bird
+        for name in delta["removed"]:
+            existed_before.setdefault(name, True)
+            latest[name] = None
+    merged = {"added": [], "updated": [], "removed": [], "order": order}
+    for name, existed in existed_before.items():
+        bird = latest[name]
+        if bird is None:
+            if existed:
+                merged["removed"].append(name)
+        else:
+            merged["updated" if existed else "added"].append(bird)
+    return epoch, version, merged
+
+# --- Warm Start ---
+def save_warm_start_snapshot():
+    """Write the current snapshot to WARM_START_FILE if it is live data that hasn't been saved yet.
+
+    Not needed with a shared store, which already keeps every published snapshot.
+    """
+    global WARM_START_SAVED_VERSION
+    if SHARED_SNAPSHOT is not None:
+        return
+    with BIRD_DATA_CACHE_LOCK:
+        version = BIRD_DATA_CACHE["version"]
+        bird_data = BIRD_DATA_CACHE["data"]
+        api_is_down = BIRD_DATA_CACHE["api_is_down"]
+    if not bird_data or api_is_down or version == WARM_START_SAVED_VERSION:
+        return
+    temp_path = f"{WARM_START_FILE}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": version, "saved_at": time.time(), "birds": bird_data}, f)
+        os.replace(temp_path, WARM_START_FILE)
+        WARM_START_SAVED_VERSION = version
+    except (IOError, OSError) as exc:
+        print(f"[WARNING] Could not save the warm-start snapshot: {exc}")
+
+def restore_warm_start_snapshot():
+    """Load the last snapshot so the first page load doesn't wait on BirdNET-Pi."""
+    source = None
+    with BIRD_DATA_CACHE_LOCK:
+        if SHARED_SNAPSHOT is not None:
+            _sync_shared_snapshot_locked(force=True)
+            if BIRD_DATA_CACHE["data"]:
+                source = "shared store"
+        elif os.path.exists(WARM_START_FILE):
+            try:
+                with open(WARM_START_FILE, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                BIRD_DATA_CACHE.update({
+                    "data": tuple(FrozenBird(bird) for bird in saved["birds"]),
+                    "api_is_down": False,
+                    "version": int(saved["version"])
+                })
+                source = "file"
+            except (IOError, ValueError, KeyError, TypeError) as exc:
+                print(f"[WARNING] Ignoring unreadable warm-start snapshot: {exc}")
+        if source:
+            # Serve the restored snapshot right away; the first refresh runs in the background.
+            BIRD_DATA_CACHE["fetched_at"] = datetime.now()
+    STARTUP_TIMINGS["warm_start"] = source
+    if source:
+        print(f"[INFO] Restored {len(BIRD_DATA_CACHE['data'])} birds from the {source}")
+    threading.Thread(target=initial_refresh, name="initial-refresh", daemon=True).start()
+
+def initial_refresh():
+    # Building cached image URLs needs a request context (url_for).
+    with app.test_request_context('/'):
+        get_bird_snapshot(force_refresh=True)
+
+def warm_start_save_loop():
+    while True:
+        time.sleep(WARM_START_SAVE_SECONDS)
+        try:
+            save_warm_start_snapshot()
+        except Exception as exc:
+            print(f"[ERROR] Warm-start snapshot save failed: {exc}")
+
+def start_warm_start_persistence():
+    """Save the snapshot periodically and on shutdown (SIGTERM from systemd included)."""
+    atexit.register(save_warm_start_snapshot)
+    # Under a WSGI server the worker already exits cleanly on SIGTERM; leave its handler alone.
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    threading.Thread(target=warm_start_save_loop, name="warm-start-save", daemon=True).start()
+
+def start_background_services():
+    """Open the shared store, restore the warm-start snapshot and start the background threads.
+
+    Runs once per server process: from __main__, or on the first request a
+    WSGI worker handles. Threads don't survive a fork, so a worker forked
+    from a process that already ran this runs it again.
+    """
+    global BACKGROUND_SERVICES_PID, SHARED_SNAPSHOT, IS_UPSTREAM_POLLER
+    with BACKGROUND_SERVICES_LOCK:
+        if BACKGROUND_SERVICES_PID == os.getpid():
+            return
+        BACKGROUND_SERVICES_PID = os.getpid()
+        SHARED_SNAPSHOT = open_shared_snapshot_store()
+        IS_UPSTREAM_POLLER = SHARED_SNAPSHOT is None
+        if SHARED_SNAPSHOT is None:
+            # Workers forked from one parent would otherwise share its epoch but not its versions.
+            BIRD_DATA_CACHE["epoch"] = os.urandom(4).hex()
+        if is_birdnet_configured():
+            restore_warm_start_snapshot()
+        start_warm_start_persistence()
+        start_cache_maintenance()
+        start_lazy_cache_fill()
+
+@app.before_request
+def ensure_background_services():
+    if BACKGROUND_SERVICES_PID != os.getpid():
+        start_background_services()
 
 # --- Flask Routes ---
 @app.route('/')
 def index():
     needs_setup = not is_birdnet_configured()
     if needs_setup:
-        bird_data, api_is_down = [], True
+        bird_data, api_is_down, snapshot_version, snapshot_epoch = [], True, 0, None
     else:
-        bird_data, api_is_down = get_bird_data()
+        snapshot = get_bird_snapshot()
+        bird_data, api_is_down = snapshot["data"], snapshot["api_is_down"]
+        snapshot_version, snapshot_epoch = snapshot["version"], snapshot["epoch"]
     if not os.path.exists('static'): os.makedirs('static')
     template_path = 'index.html'
     if not os.path.exists(os.path.join('static', template_path)):
@@ -520,7 +1156,8 @@ def index():
     return render_template(
         template_path, birds=bird_data, refresh_interval=refresh_interval,
         api_is_down=api_is_down, server_url=server_url, requires_setup=needs_setup,
-        display_url=display_url, config_version=config_version
+        display_url=display_url, config_version=config_version, snapshot_version=snapshot_version,
+        snapshot_epoch=snapshot_epoch
     )
 
 @app.route('/data')
@@ -534,13 +1171,36 @@ def data():
             'requires_setup': True,
             'config_version': int(CONFIG.get('config_version', 0))
         })
-    bird_data, api_is_down = get_bird_data(force_refresh=force_refresh)
-    return jsonify({
-        'birds': bird_data,
-        'api_is_down': api_is_down,
+    snapshot = get_bird_snapshot(force_refresh=force_refresh)
+    config_version = int(CONFIG.get('config_version', 0))
+    epoch, version = snapshot["epoch"], snapshot["version"]
+    payload = {
+        'api_is_down': snapshot["api_is_down"],
         'requires_setup': False,
-        'config_version': int(CONFIG.get('config_version', 0))
-    })
+        'config_version': config_version
+    }
+    since = request.args.get('since', type=int)
+    delta = None
+    if since is not None:
+        # A newer snapshot may have been published since ours; the delta carries its own version.
+        delta_epoch, delta_version, delta = get_snapshot_delta(since, request.args.get('epoch'))
+    if delta is None:
+        payload.update({'full': True, 'birds': snapshot["data"]})
+    else:
+        epoch, version = delta_epoch, delta_version
+        payload.update({'full': False, 'since': since, 'delta': delta})
+    payload.update({'epoch': epoch, 'version': version})
+    if STARTUP_TIMINGS["first_data_ms"] is None:
+        STARTUP_TIMINGS["first_data_ms"] = round((time.perf_counter() - STARTUP_STARTED_AT) * 1000)
+        print(f"[INFO] First /data served {STARTUP_TIMINGS['first_data_ms']} ms after startup "
+              f"(imports {STARTUP_TIMINGS['imports_ms']} ms, warm start from {STARTUP_TIMINGS['warm_start'] or 'nothing'})")
+    response = jsonify(payload)
+    # The payload only changes with the snapshot, so clients revalidate and get a 304 in between.
+    response.set_etag(f"{config_version}-{epoch}-{version}")
+    response.headers['Cache-Control'] = 'no-cache'
+    # A header rather than a body field, so the body (and its ETag) still depends only on the version.
+    response.headers['X-Data-Refresh'] = snapshot["refresh"]
+    return response.make_conditional(request)
 
 @app.route('/api/config/base_url', methods=['POST'])
 def update_base_url():
@@ -575,6 +1235,51 @@ def debug_bird_data():
     ]
     return "".join(html)
 
+@app.route('/api/perf', methods=['POST'])
+def record_perf_report():
+    """Store a frame/long-task timing report sent by the kiosk page."""
+    payload = request.get_json(silent=True, force=True) or {}
+    report = {'received_at': time.time()}
+    for field in PERF_REPORT_FIELDS:
+        try:
+            report[field] = round(float(payload.get(field, 0)), 1)
+        except (TypeError, ValueError):
+            report[field] = 0.0
+    with PERF_REPORTS_LOCK:
+        PERF_REPORTS.append(report)
+    if report['slow_frames'] or report['long_tasks']:
+        print(f"[INFO] Kiosk render: {int(report['slow_frames'])}/{int(report['frames'])} slow frames, "
+              f"{int(report['long_tasks'])} long tasks (max {report['max_long_task_ms']}ms), "
+              f"slowest transition {report['max_transition_ms']}ms")
+    return '', 204
+
+def read_process_usage():
+    """CPU seconds used and current RSS (None where /proc isn't available) of this process."""
+    rss_bytes = None
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            rss_bytes = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        pass
+    return {'pid': os.getpid(), 'cpu_seconds': round(time.process_time(), 3), 'rss_bytes': rss_bytes}
+
+@app.route('/debug/perf')
+def debug_perf():
+    with PERF_REPORTS_LOCK:
+        reports = list(PERF_REPORTS)
+    frames = sum(report['frames'] for report in reports)
+    slow_frames = sum(report['slow_frames'] for report in reports)
+    return jsonify({
+        'reports': reports,
+        'frames': frames,
+        'slow_frame_ratio': round(slow_frames / frames, 4) if frames else 0.0,
+        'long_tasks': sum(report['long_tasks'] for report in reports),
+        'max_long_task_ms': max((report['max_long_task_ms'] for report in reports), default=0.0),
+        'max_transition_ms': max((report['max_transition_ms'] for report in reports), default=0.0),
+        'startup': STARTUP_TIMINGS,
+        'process': read_process_usage()
+    })
+
 @app.route('/shutdown', methods=['POST'])
 def shutdown():
     shutdown_func = request.environ.get('werkzeug.server.shutdown')
@@ -586,14 +1291,94 @@ def shutdown():
         print('Error: Not running with the Werkzeug Server. Cannot shut down.')
         return 'Server not running with Werkzeug.', 500
 
+# --- Backlight Control ---
+def discover_backlight_device():
+    """Path of the backlight device under /sys/class/backlight, or None if there is none."""
+    try:
+        devices = sorted(os.listdir(BACKLIGHT_ROOT))
+    except OSError:
+        return None
+    if not devices:
+        return None
+    device = PREFERRED_BACKLIGHT_DEVICE if PREFERRED_BACKLIGHT_DEVICE in devices else devices[0]
+    return os.path.join(BACKLIGHT_ROOT, device)
+
+class BrightnessController:
+    """Applies brightness changes on a background thread; only the latest value is written.
+
+    Writes go through a sysfs file descriptor kept open between writes. If this
+    user can't write the file, one `sudo tee` process is started and kept
+    running instead of forking a shell and sudo per change.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = None
+        self._thread = None
+        self._device = None
+        self._max_brightness = 255
+        self._fd = None
+        self._tee = None
+
+    def available(self):
+        with self._condition:
+            if self._device is None:
+                self._device = discover_backlight_device()
+                if self._device:
+                    try:
+                        with open(os.path.join(self._device, 'max_brightness'), 'r') as f:
+                            self._max_brightness = int(f.read().strip())
+                    except (IOError, ValueError):
+                        pass
+                    print(f"[INFO] Using backlight {self._device} (max brightness {self._max_brightness})")
+            return self._device is not None
+
+    def set(self, value):
+        """Queue value (0-255) for the backlight and return without waiting for the write."""
+        with self._condition:
+            self._pending = value
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="brightness", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                value, self._pending = self._pending, None
+            try:
+                self._write(round(value * self._max_brightness / 255))
+            except (OSError, ValueError) as exc:
+                print(f"[ERROR] Could not set brightness: {exc}")
+            time.sleep(BRIGHTNESS_WRITE_INTERVAL_SECONDS)
+
+    def _write(self, level):
+        data = f"{level}\n".encode()
+        path = os.path.join(self._device, 'brightness')
+        if self._fd is None and self._tee is None:
+            try:
+                self._fd = os.open(path, os.O_WRONLY)
+            except PermissionError:
+                print("[INFO] Backlight not writable directly; writing through sudo tee")
+        if self._fd is not None:
+            os.pwrite(self._fd, data, 0)
+            return
+        if self._tee is None or self._tee.poll() is not None:
+            self._tee = subprocess.Popen(['sudo', '-n', 'tee', path], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        self._tee.stdin.write(data)
+        self._tee.stdin.flush()
+
+BRIGHTNESS = BrightnessController()
+
 @app.route('/brightness', methods=['POST'])
 def set_brightness():
     try:
         brightness = request.json.get('brightness')
         if brightness is not None and 0 <= int(brightness) <= 255:
-            command = f"echo {brightness} | sudo tee /sys/class/backlight/10-0045/brightness"
-            print(f"Executing brightness command: {command}")
-            os.system(command)
+            if not BRIGHTNESS.available():
+                return jsonify({'status': 'error', 'message': 'No backlight device found'}), 404
+            BRIGHTNESS.set(int(brightness))
             return jsonify({'status': 'success', 'brightness': brightness})
         return jsonify({'status': 'error', 'message': 'Invalid brightness value'}), 400
     except Exception as e:
@@ -660,5 +1445,6 @@ if __name__ == '__main__':
         print("To build the cache, please run 'python cache_builder.py' directly.")
         sys.exit()
     
-    print(f"Starting Flask server on http://0.0.0.0:{SERVER_PORT}")
+    start_background_services()
+    print(f"Starting Flask server on http://0.0.0.0:{SERVER_PORT} ({STARTUP_TIMINGS['imports_ms']} ms of imports)")
     app.run(host='0.0.0.0', port=SERVER_PORT)
\ No newline at end of file
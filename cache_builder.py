@@ -1,12 +1,23 @@
 import os
 import re
 import csv
+import json
+import io
+import time
+import queue
+import random
+import shutil
+import math
+import fcntl
+import hashlib
+import contextlib
 import requests
-from urllib.parse import urljoin, quote_plus
-from PIL import Image
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, quote_plus, urlparse
 import threading
+# PIL and bs4 are imported inside the functions that use them, so the display
+# server (which imports this module) doesn't load them at startup.
 
 # --- Constants and Configuration ---
 CACHE_DIRECTORY = "static/bird_images_cache"
@@ -15,7 +26,53 @@ IMAGES_PER_SPECIES = 3
 BIRDNET_API_BASE = "http://localhost:8080"
 MIN_IMAGE_WIDTH = 800
 MIN_IMAGE_HEIGHT = 600
-MAX_WORKERS = 10  # Number of parallel download threads
+DISPLAY_IMAGE_WIDTH = 800  # Cached images are downscaled to just fill this size
+DISPLAY_IMAGE_HEIGHT = 600
+# Content-addressed image store: every image is stored once under its SHA-256 and
+# species folders hold hard links to it. Near-identical photos are detected with
+# a 64-bit difference hash and either rejected (same species) or shared (others).
+BLOB_DIRECTORY = os.path.join(CACHE_DIRECTORY, "_blobs")
+BLOB_INDEX_FILE = os.path.join(BLOB_DIRECTORY, "index.json")
+PHASH_DUPLICATE_DISTANCE = 6  # Max differing bits for two images to count as the same photo
+# Disk budget for the cache. When exceeded, the species detected least (weighted
+# towards recent detections) are evicted first; pinned species and the species
+# in the display's offline rotation are never evicted.
+CACHE_BUDGET_MB = 2048
+USAGE_HALF_LIFE_DAYS = 30  # A detection counts half as much after this many days
+SPECIES_USAGE_FILE = "species_usage.json"  # Detection stats written by the display
+PINNED_SPECIES_FILE = "pinned_species.json"
+# The build runs as a pipeline of stages (search -> metadata -> download -> post-process)
+# connected by bounded queues; each stage has its own pool of worker threads.
+STAGE_WORKERS = {'search': 3, 'metadata': 6, 'download': 6, 'postprocess': 2}
+STAGE_QUEUE_SIZE = 32
+# Per-host limits: (max concurrent requests, sustained requests per second)
+HOST_LIMITS = {
+    'commons.wikimedia.org': (4, 4.0),
+    'upload.wikimedia.org': (6, 10.0),
+}
+DEFAULT_HOST_LIMIT = (4, 4.0)
+MAX_RATE_LIMIT_RETRIES = 3
+DEFAULT_RETRY_AFTER_SECONDS = 10
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# Downscaled copies of every cached image, served to the kiosk through srcset so
+# small layouts (e.g. the 4-grid) don't download and decode the full image.
+VARIANT_DIRECTORY_NAME = "variants"
+VARIANT_WIDTHS = (400, 800)
+# Listed in order of preference; formats the local Pillow build can't encode are skipped.
+VARIANT_FORMATS = ('avif', 'webp')
+VARIANT_QUALITY = 75
+VARIANT_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+# Per-species build state, so interrupted or repeated runs only redo unfinished work.
+# Kept outside the cache folder: rewriting it there would change the folder's
+# mtime and make SpeciesRegistry rebuild (and reshuffle) its rotation.
+JOURNAL_FILE = "cache_journal.json"
+LEGACY_JOURNAL_FILE = os.path.join(CACHE_DIRECTORY, "cache_journal.json")
+# The display and the cache_builder CLI both update the journal and the blob
+# index; every read-modify-write of either file holds an flock on this file.
+CACHE_LOCK_FILE = "cache.lock"
+EMPTY_RETRY_HOURS = 24 * 7  # Species with no search results are retried weekly
+FAILED_RETRY_MINUTES = 30  # First retry delay after a network failure, doubled per attempt
+MAX_FAILED_RETRY_HOURS = 24
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
 }
@@ -34,6 +91,32 @@ def get_session():
         _session.headers.update(HEADERS)
     return _session
 
+# Per-host rate limiters, created on first use
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+# Cross-process cache lock (see cache_file_lock()); always taken before
+# blob_index_lock or journal_lock.
+_cache_lock_guard = threading.RLock()
+_cache_lock_file = None
+_cache_lock_depth = 0
+
+# Blob index, guarded by blob_index_lock and re-read whenever another process
+# has replaced the file. Changes are buffered (and replayed over re-reads) until
+# they are written once per species (see flush_blob_index()).
+blob_index_lock = threading.Lock()
+_blob_index = None
+_blob_index_stamp = None
+_blob_index_pending = []
+
+# Job journal, guarded by journal_lock and re-read whenever another process has
+# replaced the file. ETags are buffered and written with the species' next
+# state change instead of one save per field.
+journal_lock = threading.Lock()
+_journal = None
+_journal_stamp = None
+_journal_pending_etags = {}
+
 # Color codes for terminal output
 YELLOW = '\033[1;33m'
 RED = '\033[0;31m'
@@ -49,6 +132,41 @@ def format_author_name(author_str):
         return cleaned_author[:cut_off_point] + " ..." if cut_off_point != -1 else cleaned_author[:20] + " ..."
     return cleaned_author
 
+def species_folder_name_for(common_name):
+    """Return the cache folder name used for a species."""
+    return "".join(c for c in common_name if c.isalnum() or c in ' _').rstrip().replace(' ', '_')
+
+def variant_file_name(image_file, width, fmt):
+    """Return the file name of a size/format variant of a cached image."""
+    return f"{os.path.splitext(image_file)[0]}_{width}w.{fmt}"
+
+def list_image_variants(species_dir, image_file):
+    """Return the existing variants of a cached image grouped by format.
+
+    The result maps each format (in VARIANT_FORMATS order) to a list of
+    (width, file name relative to the species folder) tuples, smallest first.
+    """
+    variant_dir = os.path.join(species_dir, VARIANT_DIRECTORY_NAME)
+    if not os.path.isdir(variant_dir):
+        return {}
+    variants = {}
+    for fmt in VARIANT_FORMATS:
+        found = []
+        for width in VARIANT_WIDTHS:
+            name = variant_file_name(image_file, width, fmt)
+            if os.path.exists(os.path.join(variant_dir, name)):
+                found.append((width, f"{VARIANT_DIRECTORY_NAME}/{name}"))
+        if found:
+            variants[fmt] = found
+    return variants
+
+def count_cached_images(common_name):
+    """Return how many images are cached for a species."""
+    species_dir = os.path.join(CACHE_DIRECTORY, species_folder_name_for(common_name))
+    if not os.path.isdir(species_dir):
+        return 0
+    return len([f for f in os.listdir(species_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
+
 def load_species_from_file(filename):
     """Loads a list of bird species from a CSV file (common_name, scientific_name)."""
     if not os.path.exists(filename): return []
@@ -65,6 +183,124 @@ def load_species_from_file(filename):
         print(f"Error reading or parsing species CSV file '{filename}': {e}")
         return []
 
+def _directory_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class SpeciesRegistry:
+    """The species list plus an index of which species have cached images.
+
+    The CSV is parsed once and re-read only when its mtime changes. Cached
+    images are indexed per species and re-listed only when the species (or
+    variants) folder changes, so lookups cost a couple of stat() calls. The
+    registry also keeps a shuffled rotation of the listed species that have
+    cached images, which the display uses for its offline view.
+    """
+
+    def __init__(self, filename=SPECIES_FILE, cache_directory=CACHE_DIRECTORY):
+        self.filename = filename
+        self.cache_directory = cache_directory
+        self.lock = threading.RLock()
+        self._file_mtime = None
+        self._species = []
+        self._scientific_names = {}
+        self._assets = {}
+        self._cache_mtime = None
+        self._rotation = []
+        self._rotation_position = 0
+        self._uncached = []  # Listed species left out of the rotation for lack of images
+
+    def _refresh_locked(self):
+        file_mtime = _directory_mtime(self.filename)
+        if file_mtime != self._file_mtime:
+            self._file_mtime = file_mtime
+            self._species = load_species_from_file(self.filename)
+            self._scientific_names = {common: scientific for common, scientific in self._species}
+            self._cache_mtime = None
+        cache_mtime = _directory_mtime(self.cache_directory)
+        if cache_mtime != self._cache_mtime:
+            self._cache_mtime = cache_mtime
+            self._rebuild_rotation_locked()
+            return
+        # A species folder is created before its images are linked, so a rebuild
+        # in between leaves it out; re-check those (a stat each) and append them.
+        gained = [common for common in self._uncached if self._cached_assets_locked(common)]
+        if gained:
+            self._uncached = [common for common in self._uncached if common not in gained]
+            self._rotation.extend(gained)
+
+    def _rebuild_rotation_locked(self):
+        rotation = [common for common, _ in self._species if self._cached_assets_locked(common)]
+        cached = set(rotation)
+        self._uncached = [common for common, _ in self._species if common not in cached]
+        random.shuffle(rotation)
+        self._rotation = rotation
+        self._rotation_position = 0
+
+    def _cached_assets_locked(self, common_name):
+        species_dir = os.path.join(self.cache_directory, species_folder_name_for(common_name))
+        key = (_directory_mtime(species_dir), _directory_mtime(os.path.join(species_dir, VARIANT_DIRECTORY_NAME)))
+        cached = self._assets.get(common_name)
+        if cached and cached[0] == key:
+            return cached[1]
+        assets = []
+        if key[0] is not None:
+            for file in sorted(os.listdir(species_dir)):
+                if not file.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                attr_path = os.path.join(species_dir, f"{os.path.splitext(file)[0]}.txt")
+                attribution = ""
+                if os.path.exists(attr_path):
+                    with open(attr_path, 'r', encoding='utf-8') as f: attribution = f.read().strip()
+                assets.append({'file': file, 'attribution': attribution,
+                               'variants': list_image_variants(species_dir, file)})
+        self._assets[common_name] = (key, assets)
+        return assets
+
+    def species(self):
+        """The (common_name, scientific_name) pairs from the species file."""
+        with self.lock:
+            self._refresh_locked()
+            return list(self._species)
+
+    def scientific_name(self, common_name):
+        with self.lock:
+            self._refresh_locked()
+            return self._scientific_names.get(common_name, "")
+
+    def cached_assets(self, common_name):
+        """Cached images for a species as dicts with 'file', 'attribution' and 'variants'."""
+        with self.lock:
+            return self._cached_assets_locked(common_name)
+
+    def has_cached_images(self, common_name):
+        return bool(self.cached_assets(common_name))
+
+    def next_in_rotation(self, count):
+        """The next `count` species with cached images, cycling through all of them."""
+        with self.lock:
+            self._refresh_locked()
+            if not self._rotation:
+                return []
+            count = min(count, len(self._rotation))
+            start = self._rotation_position
+            picked = [self._rotation[(start + i) % len(self._rotation)] for i in range(count)]
+            self._rotation_position = (start + count) % len(self._rotation)
+            return picked
+
+    def invalidate(self, common_name=None):
+        """Forget indexed images (for one species or all) and rebuild the rotation on next use."""
+        with self.lock:
+            if common_name is None:
+                self._assets.clear()
+            else:
+                self._assets.pop(common_name, None)
+            self._cache_mtime = None
+
+SPECIES_REGISTRY = SpeciesRegistry()
+
 def check_location_settings():
     """Check if location is set in BirdNET-Go settings."""
     settings_url = f"{BIRDNET_API_BASE}/api/v2/settings"
@@ -167,6 +403,221 @@ def update_species_list_from_api():
 
     return save_species_to_file(species_list, SPECIES_FILE)
 
+# --- Job Journal ---
+def _file_stamp(path):
+    """Identifies one version of a file that is only ever replaced atomically."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+@contextlib.contextmanager
+def cache_file_lock():
+    """Holds the cross-process cache lock (re-entrant within a thread)."""
+    global _cache_lock_file, _cache_lock_depth
+    with _cache_lock_guard:
+        if _cache_lock_depth == 0:
+            _cache_lock_file = open(CACHE_LOCK_FILE, 'a')
+            fcntl.flock(_cache_lock_file, fcntl.LOCK_EX)
+        _cache_lock_depth += 1
+        try:
+            yield
+        finally:
+            _cache_lock_depth -= 1
+            if _cache_lock_depth == 0:
+                _cache_lock_file.close()
+                _cache_lock_file = None
+
+def _load_journal_locked():
+    """The journal as on disk plus this process' buffered ETags, re-read when the file changed."""
+    global _journal, _journal_stamp
+    stamp = _file_stamp(JOURNAL_FILE)
+    if stamp is None and os.path.exists(LEGACY_JOURNAL_FILE):
+        try:
+            os.replace(LEGACY_JOURNAL_FILE, JOURNAL_FILE)
+        except OSError:
+            pass  # Another process moved it first
+        stamp = _file_stamp(JOURNAL_FILE)
+    if _journal is None or stamp != _journal_stamp:
+        journal = {}
+        if stamp is not None:
+            try:
+                with open(JOURNAL_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    journal = data
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"{YELLOW}[WARNING] Ignoring unreadable cache journal '{JOURNAL_FILE}': {e}{NC}")
+        for common_name, etags in _journal_pending_etags.items():
+            journal.setdefault(common_name, {}).setdefault('etags', {}).update(etags)
+        _journal, _journal_stamp = journal, stamp
+    return _journal
+
+def _save_journal_locked():
+    """Write the journal atomically so an interrupted run never leaves it truncated.
+
+    Callers hold cache_file_lock() and loaded the journal under it, so changes
+    made by other processes are never overwritten.
+    """
+    global _journal_stamp
+    tmp_path = f"{JOURNAL_FILE}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_journal, f, separators=(',', ':'))
+        os.replace(tmp_path, JOURNAL_FILE)
+        _journal_stamp = _file_stamp(JOURNAL_FILE)
+        _journal_pending_etags.clear()
+    except IOError as e:
+        print(f"{RED}[ERROR] Failed to save cache journal: {e}{NC}")
+
+def get_journal_entry(common_name):
+    """Return a copy of the journal entry for a species (empty dict if unknown)."""
+    with journal_lock:
+        return json.loads(json.dumps(_load_journal_locked().get(common_name, {})))
+
+def update_journal_entry(common_name, **fields):
+    """Merge fields into a species' journal entry and persist the journal.
+
+    Every caller records a state change, so this is the point where buffered
+    changes (ETags) reach the disk too.
+    """
+    return update_journal_entries({common_name: fields})[common_name]
+
+def update_journal_entries(updates):
+    """Merge {common_name: fields} into the journal with a single save; returns the new entries."""
+    now = datetime.now().isoformat(timespec='seconds')
+    with cache_file_lock(), journal_lock:
+        journal = _load_journal_locked()
+        for common_name, fields in updates.items():
+            entry = journal.setdefault(common_name, {})
+            entry.update(fields)
+            entry['updated_at'] = now
+        _save_journal_locked()
+        return {common_name: dict(journal[common_name]) for common_name in updates}
+
+def record_journal_etag(common_name, url, etag):
+    """Remember the ETag a source URL was downloaded with (saved with the next state change)."""
+    if not etag:
+        return
+    with journal_lock:
+        entry = _load_journal_locked().setdefault(common_name, {})
+        if entry.setdefault('etags', {}).get(url) != etag:
+            entry['etags'][url] = etag
+            _journal_pending_etags.setdefault(common_name, {})[url] = etag
+
+def flush_journal():
+    """Write buffered journal changes, if any."""
+    with cache_file_lock(), journal_lock:
+        if _journal_pending_etags:
+            _load_journal_locked()
+            _save_journal_locked()
+
+def journal_retry_after(entry):
+    """Return the datetime before which a species should not be retried, or None."""
+    retry_after = entry.get('retry_after')
+    if not retry_after:
+        return None
+    try:
+        return datetime.fromisoformat(retry_after)
+    except ValueError:
+        return None
+
+def _retry_delay(state, attempts):
+    if state == 'empty':
+        return timedelta(hours=EMPTY_RETRY_HOURS)
+    delay = timedelta(minutes=FAILED_RETRY_MINUTES * (2 ** max(0, attempts - 1)))
+    return min(delay, timedelta(hours=MAX_FAILED_RETRY_HOURS))
+
+def mark_species_unfinished(common_name, state, **fields):
+    """Record an 'empty' or 'failed' outcome and schedule the next retry."""
+    attempts = get_journal_entry(common_name).get('attempts', 0) + 1
+    retry_after = datetime.now() + _retry_delay(state, attempts)
+    return update_journal_entry(
+        common_name, state=state, attempts=attempts,
+        retry_after=retry_after.isoformat(timespec='seconds'), **fields
+    )
+
+# --- Rate Limiting ---
+class HostRateLimiter:
+    """Caps concurrent requests to one host and spaces them with a token bucket.
+
+    A 429 (or 503) with Retry-After pauses the whole bucket, so every worker
+    talking to that host backs off together instead of hammering it.
+    """
+
+    def __init__(self, max_concurrent, requests_per_second):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.rate = requests_per_second
+        self.capacity = max(1.0, requests_per_second)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def wait_for_token(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated_at = self.paused_until
+
+def get_host_limiter(url):
+    """Return the shared rate limiter for the host of a URL."""
+    host = urlparse(url).hostname or ''
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = HostRateLimiter(*HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+            _host_limiters[host] = limiter
+        return limiter
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) to seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def rate_limited_get(url, **kwargs):
+    """GET through the session, respecting per-host concurrency and rate limits."""
+    limiter = get_host_limiter(url)
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        limiter.wait_for_token()
+        with limiter.slots:
+            response = get_session().get(url, **kwargs)
+        if response.status_code not in (429, 503) or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is None:
+            if response.status_code == 503:
+                return response
+            retry_after = DEFAULT_RETRY_AFTER_SECONDS * (2 ** attempt)
+        with print_lock:
+            print(f"{YELLOW}[WARNING] {urlparse(url).hostname} is rate limiting us, pausing {retry_after:.0f}s{NC}")
+        limiter.pause(retry_after)
+    return response
+
 # --- Web Scraping and Downloading ---
 def find_optimal_image_size(page_soup):
     """Find the smallest image size that meets minimum requirements from Wikimedia page."""
@@ -205,168 +656,928 @@ def find_optimal_image_size(page_soup):
 
     return None
 
-def _fetch_and_parse_wikimedia_search(search_query, num_images):
-    """Helper function to perform a single search query on Wikimedia and parse results."""
-    base_url = "https://commons.wikimedia.org"
-    search_url = f"{base_url}/w/index.php?search={quote_plus(search_query)}&title=Special:MediaSearch&go=Go&type=image"
+WIKIMEDIA_BASE_URL = "https://commons.wikimedia.org"
+
+def search_wikimedia_file_pages(search_query, num_images):
+    """Runs one Wikimedia media search and returns (file_page_url, thumbnail_url) pairs.
+
+    Returns None if the search request itself failed.
+    """
+    from bs4 import BeautifulSoup
+    search_url = f"{WIKIMEDIA_BASE_URL}/w/index.php?search={quote_plus(search_query)}&title=Special:MediaSearch&go=Go&type=image"
     try:
-        response = get_session().get(search_url)
+        response = rate_limited_get(search_url, timeout=15)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         result_elements = soup.select('a.sdms-image-result')
-        image_data = []
+        file_pages = []
         for result_a_tag in list(dict.fromkeys(result_elements))[:num_images]:
-            file_page_url = urljoin(base_url, result_a_tag.get('href', ''))
+            file_page_url = urljoin(WIKIMEDIA_BASE_URL, result_a_tag.get('href', ''))
             img_tag = result_a_tag.find('img')
             if not file_page_url or not img_tag or not img_tag.get('data-src'): continue
-
-            try:
-                page_response = get_session().get(file_page_url, timeout=10)
-                page_soup = BeautifulSoup(page_response.text, 'html.parser')
-
-                # Get attribution
-                attribution = "Wikimedia Commons"
-                author_header = page_soup.find('td', string=re.compile(r'^\s*Author\s*$'))
-                if author_header and author_header.find_next_sibling('td'):
-                    attribution_cell = author_header.find_next_sibling('td')
-                    attribution = attribution_cell.get_text(strip=True, separator=' ').split('(')[0].strip()
-                formatted_attribution = format_author_name(attribution)
-                final_attribution = f"© {formatted_attribution}" if formatted_attribution else "© Wikimedia Commons"
-
-                # Find optimal image size
-                optimal_url = find_optimal_image_size(page_soup)
-                if optimal_url:
-                    # Make sure it's an absolute URL
-                    if optimal_url.startswith('//'):
-                        optimal_url = 'https:' + optimal_url
-                    elif optimal_url.startswith('/'):
-                        optimal_url = base_url + optimal_url
-                    image_data.append({'url': optimal_url, 'attribution': final_attribution})
-                else:
-                    # Fallback to full resolution if optimal size not found
-                    thumbnail_url = img_tag['data-src']
-                    full_res_url = thumbnail_url.replace('/thumb', '').rsplit('/', 1)[0]
-                    image_data.append({'url': full_res_url, 'attribution': final_attribution})
-
-            except requests.exceptions.RequestException: continue
-        return image_data
+            file_pages.append((file_page_url, img_tag['data-src']))
+        return file_pages
     except requests.exceptions.RequestException as e:
         print(f"Error scraping Wikimedia for query '{search_query}': {e}")
-        return []
+        return None
 
-def scrape_wikimedia_for_image_data(common_name, scientific_name, num_images):
-    """Searches Wikimedia with a priority of queries to find the best quality images."""
-    search_queries = [f"{common_name} {scientific_name} bird", f"{scientific_name} bird", f"{common_name} bird"]
+def fetch_file_page_image_info(file_page_url, thumbnail_url):
+    """Reads a Wikimedia file page and returns the image URL to download plus its attribution."""
+    from bs4 import BeautifulSoup
+    page_response = rate_limited_get(file_page_url, timeout=10)
+    page_soup = BeautifulSoup(page_response.text, 'html.parser')
+
+    # Get attribution
+    attribution = "Wikimedia Commons"
+    author_header = page_soup.find('td', string=re.compile(r'^\s*Author\s*$'))
+    if author_header and author_header.find_next_sibling('td'):
+        attribution_cell = author_header.find_next_sibling('td')
+        attribution = attribution_cell.get_text(strip=True, separator=' ').split('(')[0].strip()
+    formatted_attribution = format_author_name(attribution)
+    final_attribution = f"© {formatted_attribution}" if formatted_attribution else "© Wikimedia Commons"
+
+    # Find optimal image size
+    optimal_url = find_optimal_image_size(page_soup)
+    if optimal_url:
+        # Make sure it's an absolute URL
+        if optimal_url.startswith('//'):
+            optimal_url = 'https:' + optimal_url
+        elif optimal_url.startswith('/'):
+            optimal_url = WIKIMEDIA_BASE_URL + optimal_url
+        return {'url': optimal_url, 'attribution': final_attribution}
+    # Fallback to full resolution if optimal size not found
+    full_res_url = thumbnail_url.replace('/thumb', '').rsplit('/', 1)[0]
+    return {'url': full_res_url, 'attribution': final_attribution}
+
+def _fetch_and_parse_wikimedia_search(search_query, num_images):
+    """Helper function to perform a single search query on Wikimedia and parse results."""
+    file_pages = search_wikimedia_file_pages(search_query, num_images)
+    if file_pages is None:
+        return None
+    image_data = []
+    for file_page_url, thumbnail_url in file_pages:
+        try:
+            image_data.append(fetch_file_page_image_info(file_page_url, thumbnail_url))
+        except requests.exceptions.RequestException: continue
+    return image_data
+
+def build_search_queries(common_name, scientific_name):
+    """Wikimedia queries for a species, most specific first."""
+    return [f"{common_name} {scientific_name} bird", f"{scientific_name} bird", f"{common_name} bird"]
+
+def find_species_image_data(common_name, scientific_name, num_images):
+    """Runs the prioritised Wikimedia queries for a species.
+
+    Returns (query, image_data, had_errors): the query that produced results
+    (or the last one tried), the image data found, and whether any search
+    request failed, so "nothing exists" can be told apart from "couldn't look".
+    """
+    search_queries = build_search_queries(common_name, scientific_name)
+    had_errors = False
     for query in search_queries:
         image_data = _fetch_and_parse_wikimedia_search(query, num_images)
-        if image_data: return image_data
-    return []
+        if image_data is None:
+            had_errors = True
+        elif image_data:
+            return query, image_data, had_errors
+    return search_queries[-1], [], had_errors
 
-def download_image_and_attribution(image_info, folder_path, file_name_base):
-    """Downloads an image and saves its attribution, skipping if files already exist."""
+def scrape_wikimedia_for_image_data(common_name, scientific_name, num_images):
+    """Searches Wikimedia with a priority of queries to find the best quality images."""
+    return find_species_image_data(common_name, scientific_name, num_images)[1]
+
+def download_image_and_attribution(image_info, folder_path, file_name_base, etag=None):
+    """Downloads an image into the blob store and links it into a species folder.
+
+    Skips the download when the files already exist or when the same source
+    file is already in the store (e.g. cached for a related species). When
+    the image is on disk but its attribution is missing, the download is
+    made conditional on the recorded ETag so an unchanged source is not
+    fetched again. Returns (success, etag).
+    """
     if not os.path.exists(folder_path):
         os.makedirs(folder_path, exist_ok=True)
     file_ext = os.path.splitext(image_info['url'].split('(')[0])[-1] or ".jpg"
     image_file_path = os.path.join(folder_path, f"{file_name_base}{file_ext}")
     attr_file_path = os.path.join(folder_path, f"{file_name_base}.txt")
-    if os.path.exists(image_file_path) and os.path.exists(attr_file_path): return
+    image_exists = os.path.exists(image_file_path)
+    if image_exists and os.path.exists(attr_file_path): return True, etag
     try:
-        image_response = get_session().get(image_info['url'], timeout=15)
-        image_response.raise_for_status()
-        with open(image_file_path, 'wb') as f: f.write(image_response.content)
-        with open(attr_file_path, 'w', encoding='utf-8') as f: f.write(image_info['attribution'])
+        source_key = canonical_source_key(image_info['url'])
+        digest = None if image_exists else find_blob_for_source(source_key)
+        if digest is not None:
+            if not link_blob(digest, image_file_path, image_info['attribution']):
+                return True, etag
+        else:
+            request_headers = {'If-None-Match': etag} if image_exists and etag else {}
+            image_response = rate_limited_get(image_info['url'], headers=request_headers, timeout=15)
+            if image_response.status_code == 304:
+                write_cached_attribution(image_file_path, image_info['attribution'])
+            else:
+                image_response.raise_for_status()
+                etag = image_response.headers.get('ETag', etag)
+                if store_image_blob(image_response.content, file_ext, source_key, image_file_path,
+                                    image_info['attribution']) is None:
+                    with print_lock:
+                        print(f"Skipped {file_name_base}: near-duplicate of an image already cached for this species")
+                    return True, etag
         with print_lock:
             print(f"Successfully cached {os.path.basename(image_file_path)}")
-    except (requests.exceptions.RequestException, IOError) as e:
+        return True, etag
+    except (requests.exceptions.RequestException, IOError, OSError) as e:
         with print_lock:
             print(f"Failed to download/save for {file_name_base}. Error: {e}")
+        return False, etag
+
+# --- Content-Addressed Image Store ---
+def _apply_blob_change(index, change):
+    kind, digest, value, meta = change
+    if kind == 'source':
+        index['sources'][value] = digest
+    else:
+        blob = index['blobs'].setdefault(digest, {'ext': meta['ext'], 'phash': meta['phash'], 'refs': []})
+        if meta.get('attribution') is not None:
+            blob.setdefault('attribution', meta['attribution'])
+        if value not in blob['refs']:
+            blob['refs'].append(value)
+
+def _change_blob_index_locked(index, change):
+    """Apply a ('source', digest, source_key, None) or ('ref', digest, ref, blob) change and buffer it."""
+    _apply_blob_change(index, change)
+    _blob_index_pending.append(change)
+
+def _load_blob_index_locked():
+    """The blob index as on disk plus this process' buffered changes, re-read when the file changed."""
+    global _blob_index, _blob_index_stamp
+    stamp = _file_stamp(BLOB_INDEX_FILE)
+    if _blob_index is None or stamp != _blob_index_stamp:
+        index = {'blobs': {}, 'sources': {}}
+        if stamp is not None:
+            try:
+                with open(BLOB_INDEX_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    index['blobs'].update(data.get('blobs', {}))
+                    index['sources'].update(data.get('sources', {}))
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"{YELLOW}[WARNING] Ignoring unreadable blob index '{BLOB_INDEX_FILE}': {e}{NC}")
+        for change in _blob_index_pending:
+            _apply_blob_change(index, change)
+        _blob_index, _blob_index_stamp = index, stamp
+    return _blob_index
+
+def _save_blob_index_locked():
+    """Write the blob index; callers hold cache_file_lock() and loaded the index under it."""
+    global _blob_index_stamp
+    os.makedirs(BLOB_DIRECTORY, exist_ok=True)
+    tmp_path = f"{BLOB_INDEX_FILE}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_blob_index, f)
+        os.replace(tmp_path, BLOB_INDEX_FILE)
+        _blob_index_stamp = _file_stamp(BLOB_INDEX_FILE)
+        _blob_index_pending.clear()
+    except IOError as e:
+        print(f"{RED}[ERROR] Failed to save blob index: {e}{NC}")
+
+def flush_blob_index():
+    """Write buffered blob index changes, if any."""
+    with cache_file_lock(), blob_index_lock:
+        if _blob_index_pending:
+            _load_blob_index_locked()
+            _save_blob_index_locked()
+
+def blob_path(digest, ext, suffix=""):
+    """Return the on-disk path of a blob (or of one of its variants when suffix is set)."""
+    return os.path.join(BLOB_DIRECTORY, digest[:2], f"{digest}{suffix}{ext}")
+
+def _cache_relative_path(path):
+    return os.path.relpath(path, CACHE_DIRECTORY).replace(os.sep, '/')
+
+def canonical_source_key(url):
+    """Identify the source file behind a URL, so thumbnails of one Wikimedia file share a key."""
+    match = re.search(r'/wikipedia/commons/(?:thumb/)?([0-9a-f]/[0-9a-f]{2}/[^/?#]+)', url)
+    if match:
+        return f"commons:{match.group(1)}"
+    return url.split('?', 1)[0]
+
+def compute_image_phash(img):
+    """64-bit difference hash of an image, as a hex string."""
+    from PIL import Image
+    pixels = list(img.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] < pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+def phash_distance(first, second):
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+def find_blob_for_source(source_key):
+    """Return the digest already stored for a source file, or None."""
+    with blob_index_lock:
+        index = _load_blob_index_locked()
+        digest = index['sources'].get(source_key)
+        if digest and digest in index['blobs'] and os.path.exists(blob_path(digest, index['blobs'][digest]['ext'])):
+            return digest
+        return None
+
+def _prepare_image_bytes(data, ext):
+    """Decode downloaded bytes, returning (bytes to store, phash).
+
+    Images larger than needed are downscaled here, before hashing, so stored
+    blobs are never rewritten afterwards.
+    """
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        phash = compute_image_phash(img)
+        w, h = img.size
+        scale = max(DISPLAY_IMAGE_WIDTH / w, DISPLAY_IMAGE_HEIGHT / h)
+        if scale >= 1:
+            return data, phash
+        resized = img.resize((int(w * scale), int(h * scale)), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, format=img.format or Image.registered_extensions().get(ext.lower(), 'JPEG'))
+        return out.getvalue(), phash
+
+def _species_ref_prefix(dest_path):
+    return _cache_relative_path(os.path.dirname(dest_path)) + '/'
+
+def _link_blob_locked(index, digest, dest_path, attribution):
+    """Links a blob to dest_path and writes the credit kept with the blob next to it.
+
+    attribution is the credit of the downloaded image; it is only used (and
+    kept) when the blob has none yet, so a reused photo keeps its own author.
+    """
+    blob = index['blobs'][digest]
+    _link_or_copy(blob_path(digest, blob['ext']), dest_path)
+    ref = _cache_relative_path(dest_path)
+    if ref not in blob['refs'] or (attribution is not None and 'attribution' not in blob):
+        _change_blob_index_locked(index, ('ref', digest, ref, dict(blob, attribution=blob.get('attribution', attribution))))
+    if blob.get('attribution') is not None:
+        _write_attribution(dest_path, blob['attribution'])
+
+def _write_attribution(image_path, attribution):
+    with open(f"{os.path.splitext(image_path)[0]}.txt", 'w', encoding='utf-8') as f: f.write(attribution)
+
+def write_cached_attribution(image_path, attribution):
+    """Writes the credit file of a cached image, preferring the credit kept with its blob."""
+    digest, _ = get_blob_for_cached_file(image_path)
+    if digest:
+        with blob_index_lock:
+            attribution = _load_blob_index_locked()['blobs'].get(digest, {}).get('attribution', attribution)
+    _write_attribution(image_path, attribution)
+
+def store_image_blob(data, ext, source_key, dest_path, attribution=None):
+    """Adds downloaded image bytes to the store and links them (and their credit) to dest_path.
+
+    Returns the digest, or None (linking nothing) when the image is a
+    near-duplicate of one this species already has. A near-duplicate of
+    another species' image reuses that blob and its attribution. The duplicate check and the new
+    reference happen under one lock, so parallel downloads of two similar
+    photos can't both get in.
+    """
+    stored_bytes, phash = _prepare_image_bytes(data, ext)
+    prefix = _species_ref_prefix(dest_path)
+    own_ref = _cache_relative_path(dest_path)
+    with blob_index_lock:
+        index = _load_blob_index_locked()
+        match = None
+        for digest, blob in index['blobs'].items():
+            if phash_distance(phash, blob['phash']) <= PHASH_DUPLICATE_DISTANCE:
+                if any(ref.startswith(prefix) and ref != own_ref for ref in blob.get('refs', [])):
+                    # Remember the mapping so this source is never downloaded again.
+                    _change_blob_index_locked(index, ('source', digest, source_key, None))
+                    return None
+                match = match or digest
+        if match is None:
+            match = hashlib.sha256(stored_bytes).hexdigest()
+            path = blob_path(match, ext)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(f"{path}.tmp", 'wb') as f: f.write(stored_bytes)
+                os.replace(f"{path}.tmp", path)
+            index['blobs'].setdefault(match, {'ext': ext, 'phash': phash, 'refs': []})
+        _change_blob_index_locked(index, ('source', match, source_key, None))
+        _link_blob_locked(index, match, dest_path, attribution)
+        return match
+
+def link_blob(digest, dest_path, attribution=None):
+    """Hard-links a stored blob to dest_path (copying where links aren't supported).
+
+    Returns False, linking nothing, when another file of the same species
+    already uses the blob.
+    """
+    prefix = _species_ref_prefix(dest_path)
+    own_ref = _cache_relative_path(dest_path)
+    with blob_index_lock:
+        index = _load_blob_index_locked()
+        if any(ref.startswith(prefix) and ref != own_ref for ref in index['blobs'][digest]['refs']):
+            return False
+        _link_blob_locked(index, digest, dest_path, attribution)
+        return True
+
+def get_blob_for_cached_file(image_path):
+    """Return (digest, ext) of the blob a cached species image came from, or (None, None)."""
+    ref = _cache_relative_path(image_path)
+    with blob_index_lock:
+        for digest, blob in _load_blob_index_locked()['blobs'].items():
+            if ref in blob.get('refs', []):
+                return digest, blob['ext']
+    return None, None
+
+def migrate_cached_images_to_store():
+    """Moves images cached before the blob store existed into it, merging exact and near duplicates."""
+    if not os.path.isdir(CACHE_DIRECTORY):
+        return
+    print("--- Moving cached images into the content-addressed store... ---")
+    migrated = 0
+    for species_folder in sorted(os.listdir(CACHE_DIRECTORY)):
+        species_dir = os.path.join(CACHE_DIRECTORY, species_folder)
+        if species_dir == BLOB_DIRECTORY or not os.path.isdir(species_dir):
+            continue
+        for file in sorted(os.listdir(species_dir)):
+            image_path = os.path.join(species_dir, file)
+            if not file.lower().endswith(IMAGE_EXTENSIONS) or get_blob_for_cached_file(image_path)[0]:
+                continue
+            try:
+                with open(image_path, 'rb') as f: data = f.read()
+                ext = os.path.splitext(file)[1]
+                attr_path = os.path.splitext(image_path)[0] + '.txt'
+                attribution = None
+                if os.path.exists(attr_path):
+                    with open(attr_path, 'r', encoding='utf-8') as f: attribution = f.read().strip()
+                if store_image_blob(data, ext, f"local:{_cache_relative_path(image_path)}", image_path, attribution) is None:
+                    # Near-duplicate of another image in this species: drop the copy.
+                    os.remove(image_path)
+                    if os.path.exists(attr_path):
+                        os.remove(attr_path)
+                migrated += 1
+            except (IOError, OSError) as e:
+                print(f"Could not move {image_path} into the store. Error: {e}")
+        flush_blob_index()
+    print(f"--- Moved {migrated} images into the store. ---")
 
 # --- Main Cache Building Process ---
 def process_species(species_info):
-    """Process a single species - fetch and download images."""
+    """Process a single species - fetch and download images.
+
+    Progress is recorded in the job journal: search results are kept so an
+    interrupted species resumes at its downloads, and species that came back
+    empty or failed are skipped until their retry window has passed.
+    """
     common_name, scientific_name = species_info
-    species_folder_name = "".join(c for c in common_name if c.isalnum() or c in ' _').rstrip().replace(' ', '_')
+    species_folder_name = species_folder_name_for(common_name)
     species_folder_path = os.path.join(CACHE_DIRECTORY, species_folder_name)
 
     # Check if already cached
-    if os.path.isdir(species_folder_path):
-        images_found = len([f for f in os.listdir(species_folder_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-        if images_found >= IMAGES_PER_SPECIES:
-            with print_lock:
-                print(f"✓ Cache for '{common_name}' is already complete ({images_found} images). Skipping.")
-            return common_name, True
+    images_found = count_cached_images(common_name)
+    if images_found >= IMAGES_PER_SPECIES:
+        if get_journal_entry(common_name).get('state') != 'complete':
+            update_journal_entry(common_name, state='complete', retry_after=None)
+        with print_lock:
+            print(f"✓ Cache for '{common_name}' is already complete ({images_found} images). Skipping.")
+        return common_name, True
 
-    # Fetch and download images
-    image_infos = scrape_wikimedia_for_image_data(common_name, scientific_name, IMAGES_PER_SPECIES)
-    if not image_infos:
+    entry = get_journal_entry(common_name)
+    retry_after = journal_retry_after(entry)
+    if entry.get('state') in ('empty', 'failed') and retry_after and retry_after > datetime.now():
         with print_lock:
-            print(f"✗ No images found for '{common_name}'")
+            print(f"… Skipping '{common_name}' ({entry['state']}), next retry after {retry_after:%Y-%m-%d %H:%M}.")
         return common_name, False
 
+    # Resume from the journalled search results when a previous run got that far
+    image_infos = entry.get('images') or []
+    if not image_infos:
+        query, image_infos, had_errors = find_species_image_data(common_name, scientific_name, IMAGES_PER_SPECIES)
+        if not image_infos:
+            state = 'failed' if had_errors else 'empty'
+            mark_species_unfinished(common_name, state, last_query=query)
+            with print_lock:
+                print(f"✗ No images found for '{common_name}'")
+            return common_name, False
+        entry = update_journal_entry(common_name, state='searched', last_query=query, images=image_infos)
+
+    all_downloaded = True
     for i, info in enumerate(image_infos):
-        download_image_and_attribution(info, species_folder_path, f"{species_folder_name}_{i+1}")
+        all_downloaded = download_species_image(common_name, info, i, entry.get('etags', {})) and all_downloaded
+
+    postprocess_species_folder(species_folder_path)
+    return common_name, finish_species(common_name, all_downloaded)
 
-    return common_name, True
+def download_species_image(common_name, info, index, etags):
+    """Downloads the index-th image of a species and journals its ETag."""
+    species_folder_name = species_folder_name_for(common_name)
+    success, etag = download_image_and_attribution(
+        info, os.path.join(CACHE_DIRECTORY, species_folder_name), f"{species_folder_name}_{index+1}", etags.get(info['url'])
+    )
+    record_journal_etag(common_name, info['url'], etag)
+    return success
+
+def finish_species(common_name, all_downloaded):
+    """Journals the final outcome of a species' downloads."""
+    # Save the store first, so a journalled outcome never refers to unsaved links.
+    flush_blob_index()
+    SPECIES_REGISTRY.invalidate(common_name)
+    if all_downloaded:
+        update_journal_entry(common_name, state='complete', attempts=0, retry_after=None,
+                             cached_images=count_cached_images(common_name))
+    else:
+        mark_species_unfinished(common_name, 'failed')
+    return all_downloaded
 
 def ensure_cache_is_built():
     """Checks for and builds the offline image cache with parallel processing."""
     print("--- Checking local image cache... ---")
-    bird_species_to_cache = load_species_from_file(SPECIES_FILE)
+    bird_species_to_cache = SPECIES_REGISTRY.species()
     if not bird_species_to_cache:
         print(f"WARNING: '{SPECIES_FILE}' not found or empty. Cannot build cache.")
         return
 
+    # Decide from the journal alone which species need any network work
+    now = datetime.now()
+    pending_species = []
+    skipped = {'complete': 0, 'retry_later': 0, 'evicted': 0}
+    adopted = {}
+    for species in bird_species_to_cache:
+        entry = get_journal_entry(species[0])
+        retry_after = journal_retry_after(entry)
+        cached_images = count_cached_images(species[0])
+        # Duplicates are rejected, so a complete species may hold fewer images than it found
+        expected_images = entry.get('cached_images') or min(IMAGES_PER_SPECIES, len(entry.get('images') or ()) or IMAGES_PER_SPECIES)
+        if entry.get('state') == 'complete' and cached_images >= expected_images:
+            skipped['complete'] += 1
+        elif cached_images >= IMAGES_PER_SPECIES:
+            # Full folders from before the journal existed: record them instead of searching again
+            adopted[species[0]] = {'state': 'complete', 'retry_after': None, 'cached_images': cached_images}
+            skipped['complete'] += 1
+        elif entry.get('state') in ('empty', 'failed') and retry_after and retry_after > now:
+            skipped['retry_later'] += 1
+        elif entry.get('state') == 'evicted':
+            skipped['evicted'] += 1
+        else:
+            pending_species.append(species)
+    if adopted:
+        update_journal_entries(adopted)
+    print(f"Journal: {skipped['complete']} species complete, {skipped['retry_later']} waiting to retry, "
+          f"{skipped['evicted']} evicted.")
+    bird_species_to_cache = pending_species
+    if not bird_species_to_cache:
+        print("--- Image cache check complete. Nothing to do. ---")
+        return
+
     total_species = len(bird_species_to_cache)
-    print(f"Processing {total_species} species with {MAX_WORKERS} parallel workers...")
+    worker_summary = ", ".join(f"{count} {stage}" for stage, count in STAGE_WORKERS.items())
+    print(f"Processing {total_species} species through the pipeline ({worker_summary} workers)...")
+    run_cache_pipeline(bird_species_to_cache)
+    print("--- Image cache check complete. ---")
+
+def run_cache_pipeline(species_list):
+    """Builds the cache for species_list as a staged pipeline.
+
+    search:      runs the Wikimedia queries for a species (skipped when the
+                 journal already holds its image list)
+    metadata:    reads one file page per result for the image URL and author
+    download:    fetches one image
+    postprocess: resizes a finished species folder and creates its variants
+
+    Stages are connected by bounded queues so a fast stage can't run far
+    ahead of a slow one, and network access goes through rate_limited_get()
+    so each host gets its own concurrency and rate limit.
+    """
+    queues = {stage: queue.Queue(maxsize=STAGE_QUEUE_SIZE) for stage in STAGE_WORKERS}
+    progress = {'searched': 0, 'pages': 0, 'downloads': 0, 'completed': 0, 'failed': 0}
+    progress_lock = threading.Lock()
+    total_species = len(species_list)
+
+    def report(job, success):
+        with progress_lock:
+            progress['completed' if success else 'failed'] += 1
+            done = progress['completed'] + progress['failed']
+            summary = (f"{progress['searched']} searched, {progress['pages']} pages, "
+                       f"{progress['downloads']} downloads, {progress['failed']} failed")
+        with print_lock:
+            print(f"[{done}/{total_species}] {'Completed' if success else 'Unfinished'}: {job['common_name']} ({summary})")
 
-    completed = 0
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # Submit all tasks
-        future_to_species = {executor.submit(process_species, species): species for species in bird_species_to_cache}
+    def queue_downloads(job):
+        job['pending'] = len(job['images'])
+        job['all_downloaded'] = True
+        for index, info in enumerate(job['images']):
+            queues['download'].put((job, index, info))
 
-        # Process completed tasks
-        for future in as_completed(future_to_species):
-            species_name, success = future.result()
-            completed += 1
+    def search_stage(job):
+        entry = get_journal_entry(job['common_name'])
+        job['etags'] = entry.get('etags', {})
+        if entry.get('images'):
+            job['images'] = entry['images']
+            queue_downloads(job)
+            return
+        had_errors = False
+        file_pages = []
+        for query in build_search_queries(job['common_name'], job['scientific_name']):
+            file_pages = search_wikimedia_file_pages(query, IMAGES_PER_SPECIES)
+            if file_pages is None:
+                had_errors, file_pages = True, []
+            elif file_pages:
+                break
+        with progress_lock:
+            progress['searched'] += 1
+        job['query'] = query
+        if not file_pages:
+            mark_species_unfinished(job['common_name'], 'failed' if had_errors else 'empty', last_query=query)
             with print_lock:
-                print(f"[{completed}/{total_species}] Completed: {species_name}")
+                print(f"✗ No images found for '{job['common_name']}'")
+            report(job, False)
+            return
+        job['page_results'] = [None] * len(file_pages)
+        job['pending'] = len(file_pages)
+        for index, (file_page_url, thumbnail_url) in enumerate(file_pages):
+            queues['metadata'].put((job, index, file_page_url, thumbnail_url))
 
-    print("--- Image cache check complete. ---")
+    def metadata_stage(job, index, file_page_url, thumbnail_url):
+        try:
+            job['page_results'][index] = fetch_file_page_image_info(file_page_url, thumbnail_url)
+        except requests.exceptions.RequestException:
+            pass
+        with progress_lock:
+            progress['pages'] += 1
+            job['pending'] -= 1
+            if job['pending']:
+                return
+        job['images'] = [info for info in job['page_results'] if info]
+        if not job['images']:
+            mark_species_unfinished(job['common_name'], 'failed', last_query=job['query'])
+            report(job, False)
+            return
+        update_journal_entry(job['common_name'], state='searched', last_query=job['query'], images=job['images'])
+        queue_downloads(job)
+
+    def download_stage(job, index, info):
+        success = download_species_image(job['common_name'], info, index, job['etags'])
+        with progress_lock:
+            progress['downloads'] += 1
+            job['all_downloaded'] = job['all_downloaded'] and success
+            job['pending'] -= 1
+            if job['pending']:
+                return
+        queues['postprocess'].put((job,))
+
+    def postprocess_stage(job):
+        postprocess_species_folder(os.path.join(CACHE_DIRECTORY, species_folder_name_for(job['common_name'])))
+        report(job, finish_species(job['common_name'], job['all_downloaded']))
+
+    handlers = {
+        'search': search_stage, 'metadata': metadata_stage,
+        'download': download_stage, 'postprocess': postprocess_stage,
+    }
+
+    def worker(stage):
+        stage_queue = queues[stage]
+        while True:
+            item = stage_queue.get()
+            try:
+                if item is None:
+                    return
+                handlers[stage](*item)
+            except Exception as e:
+                with print_lock:
+                    print(f"{RED}[ERROR] {stage} stage failed for '{item[0]['common_name']}': {e}{NC}")
+            finally:
+                stage_queue.task_done()
+
+    threads = []
+    for stage, count in STAGE_WORKERS.items():
+        for _ in range(count):
+            thread = threading.Thread(target=worker, args=(stage,), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    for common_name, scientific_name in species_list:
+        queues['search'].put(({'common_name': common_name, 'scientific_name': scientific_name},))
+
+    # Work only flows forward, so each stage is drained once all earlier ones are.
+    for stage in STAGE_WORKERS:
+        queues[stage].join()
+    for stage, count in STAGE_WORKERS.items():
+        for _ in range(count):
+            queues[stage].put(None)
+    for thread in threads:
+        thread.join()
+    flush_blob_index()
+    flush_journal()
+
+def resize_image_to_fill(image_path, target_width=DISPLAY_IMAGE_WIDTH, target_height=DISPLAY_IMAGE_HEIGHT):
+    """Downscales one image so it still fills the target size, keeping its aspect ratio."""
+    from PIL import Image
+    try:
+        with Image.open(image_path) as img:
+            w, h = img.size
+
+            # Calculate scale to FILL the screen (use max instead of min)
+            # This ensures at least one dimension meets the target
+            scale = max(target_width / w, target_height / h)
+
+            # Skip if it already just fills the target (or is smaller). Stored
+            # blobs are downscaled on ingest, so this never rewrites a shared file.
+            if scale >= 1:
+                return
+            new_width = int(w * scale)
+            new_height = int(h * scale)
+
+            print(f"Downscaling {os.path.basename(image_path)} from {w}x{h} to {new_width}x{new_height}...")
+            resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            resized_img.save(image_path)
+    except Exception as e:
+        print(f"Could not resize {image_path}. Error: {e}")
 
 def resize_cached_images():
     """Resizes large images to fill the target screen size while maintaining aspect ratio."""
     print("--- Checking and resizing large cached images... ---")
-    target_width = 800
-    target_height = 600
-    for root, _, files in os.walk(CACHE_DIRECTORY):
+    for root, dirs, files in os.walk(CACHE_DIRECTORY):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != BLOB_DIRECTORY]
         for file in files:
-            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                image_path = os.path.join(root, file)
-                try:
-                    with Image.open(image_path) as img:
-                        w, h = img.size
-
-                        # Skip if already at or below target size
-                        if w <= target_width and h <= target_height:
-                            continue
-
-                        # Calculate scale to FILL the screen (use max instead of min)
-                        # This ensures at least one dimension meets the target
-                        scale = max(target_width / w, target_height / h)
-                        new_width = int(w * scale)
-                        new_height = int(h * scale)
-
-                        print(f"Downscaling {file} from {w}x{h} to {new_width}x{new_height}...")
-                        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        resized_img.save(image_path)
-                except Exception as e:
-                    print(f"Could not resize {image_path}. Error: {e}")
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                resize_image_to_fill(os.path.join(root, file))
     print("--- Image resizing complete. ---")
 
+def get_supported_variant_formats():
+    """Return the entries of VARIANT_FORMATS that the installed Pillow can encode."""
+    from PIL import features
+    return [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+def generate_species_variants(species_dir, formats):
+    """Creates any missing variants for the images in one species folder. Returns the number created."""
+    from PIL import Image
+    created = 0
+    variant_dir = os.path.join(species_dir, VARIANT_DIRECTORY_NAME)
+    for file in sorted(os.listdir(species_dir)):
+        if not file.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        missing = [(width, fmt) for width in VARIANT_WIDTHS for fmt in formats
+                   if not os.path.exists(os.path.join(variant_dir, variant_file_name(file, width, fmt)))]
+        if not missing:
+            continue
+        image_path = os.path.join(species_dir, file)
+        # Variants of stored images live next to their blob and are linked in,
+        # so a photo shared by several species is only encoded once.
+        digest, _ = get_blob_for_cached_file(image_path)
+        try:
+            os.makedirs(variant_dir, exist_ok=True)
+            to_encode = []
+            for width, fmt in missing:
+                dest = os.path.join(variant_dir, variant_file_name(file, width, fmt))
+                shared = blob_path(digest, f".{fmt}", f"_{width}w") if digest else None
+                if shared and os.path.exists(shared):
+                    _link_or_copy(shared, dest)
+                else:
+                    to_encode.append((width, fmt, dest, shared))
+            if not to_encode:
+                continue
+            with Image.open(image_path) as img:
+                img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+                w, h = img.size
+                for width, fmt, dest, shared in to_encode:
+                    # Never upscale: a variant wider than the source is stored at source size.
+                    target_width = min(width, w)
+                    target_height = max(1, round(h * target_width / w))
+                    resized = img if target_width == w else img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+                    resized.save(shared or dest, fmt.upper(), quality=VARIANT_QUALITY)
+                    if shared:
+                        _link_or_copy(shared, dest)
+                    created += 1
+        except Exception as e:
+            print(f"Could not create variants for {image_path}. Error: {e}")
+    return created
+
+def _link_or_copy(src, dest):
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+def generate_image_variants():
+    """Creates smaller WebP/AVIF copies of every cached image for srcset serving."""
+    print("--- Generating image size variants... ---")
+    formats = get_supported_variant_formats()
+    if not formats:
+        print(f"{YELLOW}[WARNING] Pillow cannot encode any of {', '.join(VARIANT_FORMATS)}. Skipping variants.{NC}")
+        return
+    if not os.path.isdir(CACHE_DIRECTORY):
+        return
+    created = 0
+    for species_folder in sorted(os.listdir(CACHE_DIRECTORY)):
+        species_dir = os.path.join(CACHE_DIRECTORY, species_folder)
+        if species_dir != BLOB_DIRECTORY and os.path.isdir(species_dir):
+            created += generate_species_variants(species_dir, formats)
+    print(f"--- Created {created} image variants. ---")
+
+def postprocess_species_folder(species_dir):
+    """Resizes a freshly downloaded species folder and creates its variants."""
+    if not os.path.isdir(species_dir):
+        return
+    for file in sorted(os.listdir(species_dir)):
+        if file.lower().endswith(IMAGE_EXTENSIONS):
+            resize_image_to_fill(os.path.join(species_dir, file))
+    formats = get_supported_variant_formats()
+    if formats:
+        generate_species_variants(species_dir, formats)
+
+# --- Disk Budget and Eviction ---
+def load_species_usage():
+    """Load the detection stats the display records ({"species": {...}, "fallback_rotation": [...]})."""
+    usage = {'species': {}, 'fallback_rotation': []}
+    if os.path.exists(SPECIES_USAGE_FILE):
+        try:
+            with open(SPECIES_USAGE_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                usage.update(data)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"{YELLOW}[WARNING] Could not read '{SPECIES_USAGE_FILE}': {e}{NC}")
+    return usage
+
+def load_pinned_species_names():
+    """Names of pinned species that are neither dismissed nor expired."""
+    if not os.path.exists(PINNED_SPECIES_FILE):
+        return set()
+    try:
+        with open(PINNED_SPECIES_FILE, 'r', encoding='utf-8') as f:
+            pinned = json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return set()
+    now = datetime.now()
+    active = set()
+    for name, data in pinned.items():
+        try:
+            if not data.get('dismissed', False) and datetime.fromisoformat(data['pinned_until']) > now:
+                active.add(name)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return active
+
+def cache_disk_usage():
+    """Bytes used by the cache, counting hard-linked files once."""
+    seen = set()
+    total = 0
+    for root, _, files in os.walk(CACHE_DIRECTORY):
+        for file in files:
+            try:
+                st = os.stat(os.path.join(root, file))
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+def species_reclaimable_bytes(species_dir, released_links=None):
+    """Bytes evicting a species folder would free.
+
+    A file is only freed when nothing outside the folder links to it except
+    its blob, which is deleted along with the folder's last reference.
+    released_links ({(dev, inode): links}) counts links that earlier planned
+    evictions will remove; it is updated with this folder's links, so a
+    dry run can plan several evictions without deleting anything.
+    """
+    links_inside = {}
+    for root, _, files in os.walk(species_dir):
+        for file in files:
+            try:
+                st = os.stat(os.path.join(root, file))
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            count, size, nlink = links_inside.get(key, (0, st.st_size, st.st_nlink))
+            links_inside[key] = (count + 1, size, nlink)
+    released_links = {} if released_links is None else released_links
+    freed = 0
+    for key, (count, size, nlink) in links_inside.items():
+        released = released_links.get(key, 0) + count
+        if nlink - released <= 1:
+            freed += size
+        released_links[key] = released
+    return freed
+
+def usage_score(stats, now=None):
+    """Detection count with each detection decaying by USAGE_HALF_LIFE_DAYS since the last one."""
+    if not stats:
+        return 0.0
+    now = now or datetime.now()
+    try:
+        age_days = max(0.0, (now - datetime.fromisoformat(stats['last_seen'])).total_seconds() / 86400)
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+    return stats.get('count', 0) * math.pow(0.5, age_days / USAGE_HALF_LIFE_DAYS)
+
+def rank_species_for_eviction(protected_species=(), usage=None):
+    """Cached species folders ordered from first to last to evict, as (folder, common_name, score)."""
+    if not os.path.isdir(CACHE_DIRECTORY):
+        return []
+    usage = usage if usage is not None else load_species_usage()
+    protected_folders = {species_folder_name_for(name) for name in protected_species}
+    names_by_folder = {species_folder_name_for(name): name for name in usage['species']}
+    with journal_lock:
+        names_by_folder.update({species_folder_name_for(name): name for name in _load_journal_locked()})
+    now = datetime.now()
+    candidates = []
+    for folder in os.listdir(CACHE_DIRECTORY):
+        species_dir = os.path.join(CACHE_DIRECTORY, folder)
+        if species_dir == BLOB_DIRECTORY or folder in protected_folders or not os.path.isdir(species_dir):
+            continue
+        name = names_by_folder.get(folder, folder.replace('_', ' '))
+        stats = usage['species'].get(name)
+        last_seen = (stats or {}).get('last_seen') or ''
+        candidates.append((usage_score(stats, now), last_seen, folder, name))
+    candidates.sort()
+    return [(folder, name, score) for score, _, folder, name in candidates]
+
+def evict_species_folder(folder, common_name):
+    """Deletes a species folder, drops its blob references and any blobs left unreferenced."""
+    species_dir = os.path.join(CACHE_DIRECTORY, folder)
+    prefix = f"{folder}/"
+    with cache_file_lock(), blob_index_lock:
+        index = _load_blob_index_locked()
+        for digest, blob in list(index['blobs'].items()):
+            refs = [ref for ref in blob.get('refs', []) if not ref.startswith(prefix)]
+            if len(refs) == len(blob.get('refs', [])):
+                continue
+            blob['refs'] = refs
+            if not refs:
+                blob_dir = os.path.dirname(blob_path(digest, blob['ext']))
+                for file in os.listdir(blob_dir) if os.path.isdir(blob_dir) else []:
+                    if file.startswith(digest):
+                        os.remove(os.path.join(blob_dir, file))
+                if os.path.isdir(blob_dir) and not os.listdir(blob_dir):
+                    os.rmdir(blob_dir)
+                del index['blobs'][digest]
+                index['sources'] = {key: value for key, value in index['sources'].items() if value != digest}
+        _save_blob_index_locked()
+    shutil.rmtree(species_dir, ignore_errors=True)
+    SPECIES_REGISTRY.invalidate(common_name)
+    # Evicted species are left alone by full builds; the display refills them on detection.
+    update_journal_entry(common_name, state='evicted', retry_after=None, cached_images=0)
+
+def enforce_cache_budget(budget_bytes, protected_species=(), dry_run=False, max_evictions=None):
+    """Evicts the lowest-ranked species until the cache fits in budget_bytes.
+
+    Returns the evictions as (common_name, score, freed_bytes). With dry_run
+    nothing is deleted and the returned list is what would be evicted.
+    max_evictions bounds the work of one pass so it can run incrementally.
+    The whole pass holds cache_file_lock(), so passes started by different
+    processes never interleave and each ranks against the current journal.
+    """
+    evicted = []
+    with cache_file_lock():
+        usage = cache_disk_usage()
+        if usage <= budget_bytes:
+            return evicted
+        # Links a dry run would already have removed, so shared files are counted once freed
+        released_links = {} if dry_run else None
+        for folder, common_name, score in rank_species_for_eviction(protected_species):
+            if usage <= budget_bytes or (max_evictions is not None and len(evicted) >= max_evictions):
+                break
+            freed = species_reclaimable_bytes(os.path.join(CACHE_DIRECTORY, folder), released_links)
+            if not dry_run:
+                evict_species_folder(folder, common_name)
+            usage -= freed
+            evicted.append((common_name, score, freed))
+    return evicted
+
+def run_eviction_command(argv):
+    """Handles `cache_builder.py evict [--budget-mb N] [--dry-run]`."""
+    budget_mb = CACHE_BUDGET_MB
+    if '--budget-mb' in argv:
+        try:
+            budget_mb = float(argv[argv.index('--budget-mb') + 1])
+        except (IndexError, ValueError):
+            print(f"{RED}[ERROR] --budget-mb needs a number{NC}")
+            return False
+    dry_run = '--dry-run' in argv
+    usage = load_species_usage()
+    protected = load_pinned_species_names() | set(usage.get('fallback_rotation', []))
+    used = cache_disk_usage()
+    print(f"Cache uses {used / 1048576:.1f} MB of a {budget_mb:.0f} MB budget; {len(protected)} species protected.")
+    evicted = enforce_cache_budget(int(budget_mb * 1048576), protected, dry_run=dry_run)
+    if not evicted:
+        print("Nothing to evict.")
+        return True
+    verb = "Would evict" if dry_run else "Evicted"
+    for common_name, score, freed in evicted:
+        print(f"{verb} {common_name}: score {score:.2f}, {freed / 1048576:.1f} MB")
+    print(f"{verb} {len(evicted)} species, {sum(freed for _, _, freed in evicted) / 1048576:.1f} MB in total.")
+    return True
+
 # This allows the script to be run directly from the command line
 if __name__ == '__main__':
     import sys
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'evict':
+        sys.exit(0 if run_eviction_command(sys.argv[2:]) else 1)
+
     # Check for --update-species flag
     if '--update-species' in sys.argv:
         print("--- Updating Species List from API ---")
@@ -382,6 +1593,8 @@ if __name__ == '__main__':
             sys.exit(1)
 
     print("--- Starting Offline Image Cache Builder ---")
+    migrate_cached_images_to_store()
     ensure_cache_is_built()
     resize_cached_images()
+    generate_image_variants()
     print("--- Cache building process complete. ---")
\ No newline at end of file
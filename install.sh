@@ -42,6 +42,7 @@ cp "$SOURCE_DIR/requirements.txt" "$INSTALL_DIR/"
 cp "$SOURCE_DIR/run.sh" "$INSTALL_DIR/"
 cp "$SOURCE_DIR/kiosk_launcher.sh" "$INSTALL_DIR/"
 cp "$SOURCE_DIR/cache_builder.py" "$INSTALL_DIR/"
+cp "$SOURCE_DIR/upstream_sim.py" "$INSTALL_DIR/"
 cp "$SOURCE_DIR/species_list.csv" "$INSTALL_DIR/"
 mkdir -p "$INSTALL_DIR/static"
 cp -r "$SOURCE_DIR/static/index.html" "$INSTALL_DIR/static/"
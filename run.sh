@@ -3,4 +3,8 @@
 echo "Starting the Bird Detection Display..."
 cd "/home/super/birdnet_display"
 source venv/bin/activate
+if [ -n "$BIRDNET_DISPLAY_WORKERS" ]; then
+    # Several worker processes sharing one snapshot; needs shared_snapshot_path in config.json.
+    exec gunicorn --workers "$BIRDNET_DISPLAY_WORKERS" --threads 4 --bind 0.0.0.0:5000 birdnet_display:app
+fi
 python3 birdnet_display.py
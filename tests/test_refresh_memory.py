@@ -0,0 +1,83 @@
+"""Memory used by one detections refresh on a full (1000-row) BirdNET-Pi page."""
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import birdnet_display  # noqa: E402
+
+ROW_COUNT = 1000
+SPECIES_COUNT = 40
+MAX_REFRESH_PEAK_BYTES = 16 * 1024 * 1024  # The parse tree alone is ~11 MB
+MAX_RETAINED_BYTES = 1024 * 1024
+ROW_TEMPLATE = (
+    '<tr class="relative"><td>{time}</td><td id="recent_detection_middle_td">'
+    '<div><img id="birdimage" src=""></div>'
+    '<form><button name="species" value="{name}">{name}</button><br><i>{scientific_name}<br></i></form></td>'
+    '<td>Confidence: {confidence}%<audio src="/By_Date/{date}/{folder}/{folder}-test.mp3"></audio></td></tr>'
+)
+
+
+def make_detections_page():
+    now = datetime.now()
+    rows = []
+    for i in range(ROW_COUNT):
+        detected = now - timedelta(seconds=i * 5)
+        name = f"Bird {i % SPECIES_COUNT}"
+        rows.append(ROW_TEMPLATE.format(
+            time=detected.strftime("%H:%M:%S"), date=detected.strftime("%Y-%m-%d"), name=name,
+            folder=name.replace(' ', '_'), scientific_name=f"Avis {i % SPECIES_COUNT}", confidence=80
+        ))
+    return "<table>" + "".join(rows) + "</table>"
+
+
+class FakeResponse:
+    def __init__(self, text="", payload=None):
+        self.status_code = 200
+        self.text = text
+        self.headers = {}
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def test_refresh_memory(monkeypatch):
+    page = make_detections_page()
+
+    def fake_get(url, *args, **kwargs):
+        if 'comname=' in url:
+            return FakeResponse(payload=[])
+        return FakeResponse(page)
+
+    monkeypatch.setattr(birdnet_display.requests, 'get', fake_get)
+    monkeypatch.setattr(birdnet_display, 'BIRDNET_PI_BASE_URL', 'http://birdnet.test')
+    monkeypatch.setattr(birdnet_display, 'queue_cache_fill', lambda *args, **kwargs: False)
+    monkeypatch.setattr(birdnet_display, 'DETECTION_CACHE', {"times": {}, "pinned": frozenset(), "raw_data": ()})
+
+    with birdnet_display.app.test_request_context('/'):
+        # The first refresh imports bs4 and fills the per-species caches.
+        birdnet_display._fetch_bird_data_from_source()
+        # Forget the previous rows so the measured refresh rebuilds every record.
+        birdnet_display.DETECTION_CACHE.update({"times": {}, "raw_data": ()})
+        # With the cycle collector off, anything left in cycles shows up as retained.
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            birds, api_is_down = birdnet_display._fetch_bird_data_from_source()
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+
+    assert not api_is_down
+    assert len(birds) == SPECIES_COUNT
+    assert peak < MAX_REFRESH_PEAK_BYTES, f"refresh peaked at {peak / 1048576:.1f} MB"
+    # Nothing of the parse tree may outlive the refresh.
+    assert retained < MAX_RETAINED_BYTES, f"refresh left {retained / 1048576:.1f} MB allocated"
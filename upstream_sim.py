@@ -0,0 +1,504 @@
+"""Capacity testing helpers for the display server.
+
+    python upstream_sim.py record [--base-url URL] [--out FILE] [--interval S] [--duration S]
+        Polls a real BirdNET-Pi and appends its detection list and per-species
+        stats responses to a JSON-lines recording.
+
+    python upstream_sim.py replay [--recording FILE] [--speed X] [--port N]
+                                  [--synthetic-per-minute N]
+                                  [--outage-every S] [--outage-seconds S] [--outage-mode error|hang]
+        Serves a recording as a stand-in BirdNET-Pi, 1x-100x faster than real
+        time, optionally mixing in synthetic detections and injected outages.
+        Point the display at it with http://127.0.0.1:<port>.
+
+    python upstream_sim.py load [--target URL] [--clients N] [--page-clients N]
+                                [--duration S] [--interval S] [--server-pid PID]
+        Drives N concurrent /data clients (polling like the kiosk page does) and
+        N clients loading /, then reports throughput, p50/p99 latency and the
+        server's CPU and RSS. Run it from another machine when measuring a Pi,
+        so the load generator doesn't compete with the server for CPU; CPU and
+        RSS then come from the server's /debug/perf (the one process that
+        answers it) instead of /proc.
+"""
+import os
+import re
+import sys
+import csv
+import json
+import time
+import random
+import threading
+import requests
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+from bs4 import BeautifulSoup
+
+# --- Constants and Configuration ---
+CONFIG_PATH = "config.json"
+SPECIES_FILE = "species_list.csv"
+DEFAULT_RECORDING_FILE = "upstream_recording.jsonl"
+DEFAULT_RECORD_INTERVAL_SECONDS = 10
+DEFAULT_REPLAY_PORT = 8081
+MAX_REPLAY_SPEED = 100
+MAX_SYNTHETIC_DETECTIONS = 50  # Older synthetic detections drop off the replayed list
+OUTAGE_HANG_SECONDS = 15  # Longer than the display's upstream timeout
+SERVER_SAMPLE_SECONDS = 0.5
+LIST_PATH = "/todays_detections.php"
+# Markup of one BirdNET-Pi detection row, reduced to what the display parses
+DETECTION_ROW_TEMPLATE = (
+    '<tr class="relative"><td>{time}</td><td id="recent_detection_middle_td">'
+    '<div><img id="birdimage" src=""></div>'
+    '<form><button name="species" value="{name}">{name}</button><br><i>{scientific_name}<br></i></form></td>'
+    '<td>Confidence: {confidence}%<audio src="/By_Date/{date}/{folder}/{folder}-synthetic.mp3"></audio></td></tr>'
+)
+
+
+def _option(argv, name, default, cast=str):
+    """Value following `name` in argv, or default when absent or malformed."""
+    if name not in argv:
+        return default
+    try:
+        return cast(argv[argv.index(name) + 1])
+    except (IndexError, ValueError):
+        print(f"[WARNING] Ignoring invalid value for {name}; using {default}")
+        return default
+
+
+# --- Recorder ---
+def _latest_detection_per_species(html):
+    """{species name: time text of its newest row} from a detections list page."""
+    latest = {}
+    for row in BeautifulSoup(html, 'html.parser').select('tr.relative'):
+        button = row.find('button', attrs={'name': 'species'})
+        cells = row.find_all('td')
+        if button and cells:
+            latest.setdefault(button.get_text(strip=True), cells[0].get_text(strip=True))
+    return latest
+
+
+def run_record(argv):
+    base_url = _option(argv, '--base-url', '')
+    if not base_url and os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            base_url = json.load(f).get('birdnet_pi_base_url', '')
+    if not base_url:
+        print("[ERROR] No BirdNET-Pi URL: pass --base-url or configure the display first")
+        return False
+    base_url = base_url.rstrip('/')
+    out_path = _option(argv, '--out', DEFAULT_RECORDING_FILE)
+    interval = _option(argv, '--interval', DEFAULT_RECORD_INTERVAL_SECONDS, float)
+    duration = _option(argv, '--duration', 3600, float)
+    list_url = f"{base_url}{LIST_PATH}?ajax_detections=true&display_limit=undefined&hard_limit=1000"
+    stats_url = f"{base_url}{LIST_PATH}"
+
+    print(f"[INFO] Recording {base_url} every {interval:g}s for {duration:g}s into {out_path}")
+    seen_times = {}
+    frames = 0
+    deadline = time.time() + duration
+    with open(out_path, 'a', encoding='utf-8') as out:
+        while time.time() < deadline:
+            started = time.time()
+            try:
+                response = requests.get(list_url, timeout=10)
+                entry = {"recorded_at": started, "kind": "list", "status": response.status_code, "body": response.text}
+            except requests.exceptions.RequestException as exc:
+                # Real outages are recorded too, so replay reproduces them.
+                print(f"[WARNING] BirdNET-Pi unavailable: {exc}")
+                entry = {"recorded_at": started, "kind": "list", "status": None, "body": ""}
+            out.write(json.dumps(entry) + "\n")
+            frames += 1
+
+            if entry["status"] == 200:
+                today_str = datetime.fromtimestamp(started).strftime("%Y-%m-%d")
+                for name, time_text in _latest_detection_per_species(entry["body"]).items():
+                    if seen_times.get(name) == time_text:
+                        continue
+                    seen_times[name] = time_text
+                    try:
+                        stats = requests.get(f"{stats_url}?comname={quote(name)}&date={today_str}", timeout=5)
+                        out.write(json.dumps({
+                            "recorded_at": time.time(), "kind": "stats", "comname": name,
+                            "status": stats.status_code, "body": stats.text
+                        }) + "\n")
+                    except requests.exceptions.RequestException:
+                        pass
+            out.flush()
+            time.sleep(max(0.0, interval - (time.time() - started)))
+    print(f"[INFO] Recorded {frames} list responses")
+    return True
+
+
+# --- Replay Server ---
+class UpstreamReplay:
+    """Simulated BirdNET-Pi state: recorded frames on a sped-up clock plus synthetic detections."""
+
+    def __init__(self, recording_path, speed, synthetic_per_minute, outage_every, outage_seconds, outage_mode):
+        self.speed = speed
+        self.synthetic_per_minute = synthetic_per_minute
+        self.outage_every = outage_every
+        self.outage_seconds = outage_seconds
+        self.outage_mode = outage_mode
+        self.started_at = time.time()
+        self.frames = []  # (offset seconds, status, body)
+        self.stats = {}  # species name -> [(offset seconds, body)]
+        self.synthetic = []  # (epoch, name, scientific name, confidence), newest first
+        self.next_synthetic_at = self.started_at
+        self.lock = threading.Lock()
+        self.species = self._load_species()
+        self.recording_start = self.started_at
+        self.recording_length = 0.0
+        if recording_path:
+            self._load_recording(recording_path)
+
+    def _load_species(self):
+        if not os.path.exists(SPECIES_FILE):
+            return [("Silvereye", "Zosterops lateralis"), ("Tui", "Prosthemadera novaeseelandiae")]
+        with open(SPECIES_FILE, 'r', encoding='utf-8') as f:
+            return [(row['Common Name'], row['Scientific Name']) for row in csv.DictReader(f)]
+
+    def _load_recording(self, path):
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        if not entries:
+            return
+        self.recording_start = min(entry["recorded_at"] for entry in entries)
+        for entry in sorted(entries, key=lambda e: e["recorded_at"]):
+            offset = entry["recorded_at"] - self.recording_start
+            if entry["kind"] == "list":
+                self.frames.append((offset, entry["status"], entry["body"]))
+            elif entry["kind"] == "stats" and entry["status"] == 200:
+                self.stats.setdefault(entry["comname"], []).append((offset, entry["body"]))
+        # Loop the recording, leaving one polling interval after the last frame.
+        if len(self.frames) > 1:
+            self.recording_length = self.frames[-1][0] + (self.frames[-1][0] / (len(self.frames) - 1))
+        print(f"[INFO] Loaded {len(self.frames)} list frames and stats for {len(self.stats)} species "
+              f"({self.recording_length / 60:.1f} recorded minutes)")
+
+    def recording_offset(self, now):
+        """Position in the recording at wall time now, looping at its end."""
+        offset = (now - self.started_at) * self.speed
+        return offset % self.recording_length if self.recording_length else offset
+
+    def in_outage(self, now):
+        if not self.outage_every or not self.outage_seconds:
+            return False
+        return (now - self.started_at) % self.outage_every >= self.outage_every - self.outage_seconds
+
+    def _add_synthetic_detections(self, now):
+        if self.synthetic_per_minute <= 0:
+            return
+        with self.lock:
+            while self.next_synthetic_at <= now:
+                name, scientific_name = random.choice(self.species)
+                self.synthetic.insert(0, (self.next_synthetic_at, name, scientific_name, random.randint(70, 99)))
+                del self.synthetic[MAX_SYNTHETIC_DETECTIONS:]
+                self.next_synthetic_at += random.expovariate(self.synthetic_per_minute / 60.0)
+
+    def _frame_at(self, offset):
+        current = None
+        for frame in self.frames:
+            if frame[0] > offset:
+                break
+            current = frame
+        return current
+
+    def replay_time(self, recorded, loop):
+        """Wall time at which a detection recorded at datetime `recorded` happens in the given loop.
+
+        Fixed for the whole loop, so a detection keeps its time from poll to poll.
+        """
+        recorded_offset = recorded.timestamp() - self.recording_start + loop * self.recording_length
+        return datetime.fromtimestamp(self.started_at + recorded_offset / self.speed)
+
+    def _shift_recorded_rows(self, html, loop):
+        """Move every recorded detection onto the replay clock (see replay_time())."""
+        soup = BeautifulSoup(html, 'html.parser')
+        rows = soup.select('tr.relative')
+        for row in rows:
+            cells = row.find_all('td')
+            audio = row.find('audio')
+            if not cells or not audio or not audio.has_attr('src'):
+                continue
+            date_match = re.search(r'\d{4}-\d{2}-\d{2}', audio['src'])
+            try:
+                recorded = datetime.strptime(f"{date_match.group(0)} {cells[0].get_text(strip=True)}", "%Y-%m-%d %H:%M:%S")
+            except (AttributeError, ValueError):
+                continue
+            shifted = self.replay_time(recorded, loop)
+            cells[0].string = shifted.strftime("%H:%M:%S")
+            audio['src'] = audio['src'].replace(date_match.group(0), shifted.strftime("%Y-%m-%d"))
+        return [str(row) for row in rows]
+
+    def detections_page(self, now):
+        """(status, html) for the detections list at wall time now."""
+        self._add_synthetic_detections(now)
+        rows = []
+        with self.lock:
+            synthetic = list(self.synthetic)
+        for detected_at, name, scientific_name, confidence in synthetic:
+            detected = datetime.fromtimestamp(detected_at)
+            rows.append(DETECTION_ROW_TEMPLATE.format(
+                time=detected.strftime("%H:%M:%S"), date=detected.strftime("%Y-%m-%d"), name=name,
+                folder=name.replace(' ', '_'), scientific_name=scientific_name, confidence=confidence
+            ))
+        if self.frames:
+            offset = self.recording_offset(now)
+            frame = self._frame_at(offset)
+            if frame and frame[1] != 200:
+                return 503, ""
+            if frame:
+                loop = int((now - self.started_at) * self.speed // self.recording_length) if self.recording_length else 0
+                rows.extend(self._shift_recorded_rows(frame[2], loop))
+        return 200, "<table>" + "".join(rows) + "</table>"
+
+    def stats_response(self, name, date_str, now):
+        """JSON body for the per-species stats query."""
+        recorded = self.stats.get(name)
+        if recorded:
+            offset = self.recording_offset(now)
+            body = next((body for at, body in reversed(recorded) if at <= offset), recorded[0][1])
+            try:
+                entries = json.loads(body)
+                if isinstance(entries, list) and entries:
+                    # The newest recorded day stands in for today.
+                    newest = max(entries, key=lambda entry: entry.get('date', ''))
+                    newest['date'] = date_str
+                    return json.dumps(entries)
+            except ValueError:
+                pass
+        with self.lock:
+            count = sum(1 for detection in self.synthetic if detection[1] == name)
+        return json.dumps([{"date": date_str, "count": max(count, 1)}])
+
+
+def _make_replay_handler(replay):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            now = time.time()
+            if replay.in_outage(now):
+                if replay.outage_mode == 'hang':
+                    time.sleep(OUTAGE_HANG_SECONDS)
+                self._send(503, "", 'text/plain')
+                return
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path != LIST_PATH:
+                self._send(404, "", 'text/plain')
+            elif 'comname' in query:
+                date_str = query.get('date', [datetime.now().strftime("%Y-%m-%d")])[0]
+                self._send(200, replay.stats_response(query['comname'][0], date_str, now), 'application/json')
+            else:
+                status, html = replay.detections_page(now)
+                self._send(status, html, 'text/html')
+
+        def do_HEAD(self):
+            # The display checks image URLs with HEAD; synthetic rows have none.
+            self.send_response(404)
+            self.end_headers()
+    return ReplayHandler
+
+
+def run_replay(argv):
+    recording_path = _option(argv, '--recording', '')
+    if recording_path and not os.path.exists(recording_path):
+        print(f"[ERROR] Recording not found: {recording_path}")
+        return False
+    speed = min(max(_option(argv, '--speed', 1.0, float), 1.0), MAX_REPLAY_SPEED)
+    port = _option(argv, '--port', DEFAULT_REPLAY_PORT, int)
+    outage_mode = _option(argv, '--outage-mode', 'error')
+    if outage_mode not in ('error', 'hang'):
+        print("[ERROR] --outage-mode must be 'error' or 'hang'")
+        return False
+    replay = UpstreamReplay(
+        recording_path, speed,
+        synthetic_per_minute=_option(argv, '--synthetic-per-minute', 0.0 if recording_path else 6.0, float),
+        outage_every=_option(argv, '--outage-every', 0.0, float),
+        outage_seconds=_option(argv, '--outage-seconds', 0.0, float),
+        outage_mode=outage_mode
+    )
+    server = ThreadingHTTPServer(('0.0.0.0', port), _make_replay_handler(replay))
+    server.daemon_threads = True
+    print(f"[INFO] Simulated BirdNET-Pi on http://127.0.0.1:{port} ({speed:g}x, "
+          f"{replay.synthetic_per_minute:g} synthetic detections/min)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return True
+
+
+# --- Load Generator ---
+def find_server_pids():
+    """PIDs of running birdnet_display.py processes (Linux /proc only)."""
+    pids = []
+    if not os.path.isdir('/proc'):
+        return pids
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                args = f.read().split(b'\0')
+        except OSError:
+            continue
+        # Only the Python interpreter itself, not wrappers such as timeout or a shell.
+        if b'python' in os.path.basename(args[0]) and any(b'birdnet_display' in arg for arg in args[1:]):
+            pids.append(int(entry))
+    return pids
+
+
+def read_process_usage(pid):
+    """(CPU seconds used so far, RSS bytes) for pid, or None if it is gone."""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            # Fields after the parenthesised command name; utime and stime are 14th and 15th overall.
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/status', 'r') as f:
+            rss_kb = next((int(line.split()[1]) for line in f if line.startswith('VmRSS:')), 0)
+    except (OSError, IndexError, ValueError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'), rss_kb * 1024
+
+
+def read_local_usage(pids):
+    """(CPU seconds, RSS bytes) summed over pids, or None if none of them is running."""
+    samples = [sample for sample in (read_process_usage(pid) for pid in pids) if sample]
+    if not samples:
+        return None
+    return sum(sample[0] for sample in samples), sum(sample[1] for sample in samples)
+
+
+def read_remote_usage(target):
+    """(CPU seconds, RSS bytes) the server reports in /debug/perf, or None."""
+    try:
+        process = requests.get(f"{target}/debug/perf", timeout=5).json()['process']
+        return process['cpu_seconds'], process['rss_bytes'] or 0
+    except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
+        return None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _data_client(target, deadline, interval, results):
+    """Polls /data the way the kiosk page does: since=<version> plus ETag revalidation."""
+    session = requests.Session()
+    version, etag = 0, None
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{target}/data?since={version}",
+                                   headers={'If-None-Match': etag} if etag else {}, timeout=30)
+            if response.status_code == 200:
+                version = response.json().get('version', version)
+                etag = response.headers.get('ETag')
+            results.append((time.perf_counter() - started, response.status_code))
+        except (requests.exceptions.RequestException, ValueError):
+            results.append((time.perf_counter() - started, None))
+        if interval:
+            time.sleep(interval)
+
+
+def _page_client(target, deadline, interval, results):
+    session = requests.Session()
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{target}/", timeout=30)
+            results.append((time.perf_counter() - started, response.status_code))
+        except requests.exceptions.RequestException:
+            results.append((time.perf_counter() - started, None))
+        if interval:
+            time.sleep(interval)
+
+
+def _print_load_results(label, clients, results, elapsed):
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        key = str(status) if status else 'errors'
+        statuses[key] = statuses.get(key, 0) + 1
+    print(f"--- {label} ({clients} clients) ---")
+    print(f"  requests: {len(results)} ({len(results) / elapsed:.1f}/s); "
+          + ", ".join(f"{key}: {count}" for key, count in sorted(statuses.items())))
+    print(f"  latency: p50 {percentile(latencies, 0.50):.1f} ms, p99 {percentile(latencies, 0.99):.1f} ms, "
+          f"max {latencies[-1] if latencies else 0.0:.1f} ms")
+
+
+def run_load(argv):
+    target = _option(argv, '--target', 'http://127.0.0.1:5000').rstrip('/')
+    data_clients = _option(argv, '--clients', 10, int)
+    page_clients = _option(argv, '--page-clients', 1, int)
+    duration = _option(argv, '--duration', 30.0, float)
+    interval = _option(argv, '--interval', 0.0, float)  # Pause between a client's requests; 0 is back-to-back
+    server_pid = _option(argv, '--server-pid', 0, int)
+    # A server on this machine is measured through /proc (all of its processes);
+    # a remote one reports its own usage in /debug/perf.
+    if server_pid or urlparse(target).hostname in ('127.0.0.1', 'localhost', '::1'):
+        pids = [server_pid] if server_pid else find_server_pids()
+        sample_usage = lambda: read_local_usage(pids)
+        usage_source = f"pid {', '.join(str(pid) for pid in pids)}"
+    else:
+        sample_usage = lambda: read_remote_usage(target)
+        usage_source = "reported by /debug/perf"
+    if sample_usage() is None:
+        print("[WARNING] Server CPU/RSS won't be reported: no local birdnet_display.py process "
+              "(use --server-pid) or no usage in its /debug/perf")
+
+    print(f"[INFO] {data_clients} /data and {page_clients} / clients against {target} for {duration:g}s")
+    deadline = time.time() + duration
+    data_results, page_results = [], []
+    threads = [threading.Thread(target=_data_client, args=(target, deadline, interval, data_results), daemon=True)
+               for _ in range(data_clients)]
+    threads += [threading.Thread(target=_page_client, args=(target, deadline, interval, page_results), daemon=True)
+                for _ in range(page_clients)]
+
+    initial_usage = sample_usage()
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    peak_rss = 0
+    while any(thread.is_alive() for thread in threads):
+        usage = sample_usage()
+        peak_rss = max(peak_rss, usage[1] if usage else 0)
+        time.sleep(SERVER_SAMPLE_SECONDS)
+    elapsed = time.time() - started
+    final_usage = sample_usage()
+
+    if data_clients:
+        _print_load_results("/data", data_clients, data_results, elapsed)
+    if page_clients:
+        _print_load_results("/", page_clients, page_results, elapsed)
+    if initial_usage and final_usage:
+        cpu_seconds = final_usage[0] - initial_usage[0]
+        print(f"--- server ({usage_source}) ---")
+        print(f"  CPU: {cpu_seconds / elapsed * 100:.0f}% of one core; peak RSS {peak_rss / 1048576:.1f} MB")
+    return True
+
+
+if __name__ == '__main__':
+    commands = {'record': run_record, 'replay': run_replay, 'load': run_load}
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(1)
+    sys.exit(0 if commands[sys.argv[1]](sys.argv[2:]) else 1)